@@ -4,10 +4,13 @@ from geoalchemy2.shape import to_shape
 from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.core.security import require_admin
+from app.repositories import DocksRepository, get_docks_repository
+from app.core.security import require_admin, AdminPrincipal
 from app import models, schemas
 from app.core.storage import storage_service
-from app.core.security import get_password_hash, verify_password
+from app.core.storage_cleanup import enqueue_deletions, group_image_urls
+from app.core.security import get_password_hash_async, verify_password_async
+from app.api.defect import forget_open_report
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -16,28 +19,14 @@ async def get_docks(
     lat: float | None = None,
     lon: float | None = None,
     radius_meters: int = 1000,
-    db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    repository: DocksRepository = Depends(get_docks_repository),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
-    query = select(models.DocksGroup).options(selectinload(models.DocksGroup.docks))
-
-    if lat is not None and lon is not None:
-        user_point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
-        query = query.where(
-            func.ST_DWithin(
-                models.DocksGroup.location,
-                user_point,
-                radius_meters
-            )
-        )
-
-    result = await db.execute(query)
-    groups = result.scalars().all()
+    groups = await repository.list_groups(lat, lon, radius_meters)
 
     response = []
 
     for group in groups:
-        point = to_shape(group.location)
         docks = [
             schemas.DockResponse(
                 id=dock.id,
@@ -50,9 +39,10 @@ async def get_docks(
             "id": group.id,
             "name": group.name,
             "description": group.description,
-            "image_url": group.image_url,
-            "latitude": point.y,
-            "longitude": point.x,
+            "image_url": storage_service.resolve_image_url(group.image_url),
+            "image_variants": storage_service.resolve_image_variants(group.image_variants),
+            "latitude": group.latitude,
+            "longitude": group.longitude,
             "docks": docks
         })
 
@@ -62,7 +52,7 @@ async def get_docks(
 async def create_docks_group(
     data: schemas.DocksGroupCreate,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     location = func.ST_SetSRID(func.ST_MakePoint(data.longitude, data.latitude), 4326)
 
@@ -81,7 +71,8 @@ async def create_docks_group(
         "id": group.id,
         "name": group.name,
         "description": group.description,
-        "image_url": group.image_url,
+        "image_url": storage_service.resolve_image_url(group.image_url),
+        "image_variants": None,
         "latitude": data.latitude,
         "longitude": data.longitude,
         "docks": [],
@@ -92,7 +83,7 @@ async def create_docks_group(
 async def create_dock(
     data: schemas.DockCreate,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     group = await db.get(models.DocksGroup, data.group_id)
     if not group:
@@ -116,7 +107,7 @@ async def update_docks_group(
     group_id: int,
     data: schemas.DocksGroupUpdate,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     stmt = select(models.DocksGroup).options(selectinload(models.DocksGroup.docks)).where(models.DocksGroup.id == group_id)
     result = await db.execute(stmt)
@@ -131,6 +122,8 @@ async def update_docks_group(
         group.description = data.description
     if data.image_url is not None:
         group.image_url = data.image_url
+        # Les déclinaisons ne correspondent plus à une URL fournie manuellement
+        group.image_variants = None
 
     if data.latitude is not None and data.longitude is not None:
         group.location = func.ST_SetSRID(func.ST_MakePoint(data.longitude, data.latitude), 4326)
@@ -145,7 +138,8 @@ async def update_docks_group(
         "id": group.id,
         "name": group.name,
         "description": group.description,
-        "image_url": group.image_url,
+        "image_url": storage_service.resolve_image_url(group.image_url),
+        "image_variants": storage_service.resolve_image_variants(group.image_variants),
         "latitude": point.y,
         "longitude": point.x,
         "docks": docks,
@@ -156,7 +150,7 @@ async def update_dock(
     dock_id: int,
     data: schemas.DockUpdate,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     dock = await db.get(models.Dock, dock_id)
     if not dock:
@@ -189,17 +183,14 @@ async def update_dock(
 async def delete_docks_group(
     group_id: int,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     group = await db.get(models.DocksGroup, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Docks group not found")
 
-    if group.image_url:
-        try:
-            storage_service.delete_image(group.image_url)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Image delete failed: {str(e)}")
+    # Suppression des images différée, validée avec la suppression du groupe
+    enqueue_deletions(db, group_image_urls(group))
 
     await db.delete(group)
     await db.commit()
@@ -210,7 +201,7 @@ async def delete_docks_group(
 async def delete_dock(
     dock_id: int,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     dock = await db.get(models.Dock, dock_id)
     if not dock:
@@ -227,24 +218,37 @@ async def upload_docks_group_image(
     group_id: int,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     group = await db.get(models.DocksGroup, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Docks group not found")
     
-    if group.image_url:
-        storage_service.delete_image(group.image_url)
-    
     try:
         image_url = await storage_service.upload_image(
             file=file,
-            folder="docks-groups"
+            folder="docks-groups",
+            close_file=False
         )
+        # Miniature / moyenne / pleine taille en WebP, générées dans un pool de processus
+        try:
+            image_variants = await storage_service.upload_image_variants(file, image_url)
+        except Exception:
+            # Original et déclinaisons éventuellement déjà envoyées
+            enqueue_deletions(db, [image_url, *storage_service.variant_urls(image_url)])
+            await db.commit()
+            raise
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
+    finally:
+        await file.close()
     
+    # Anciennes images supprimées en différé, dans la même transaction que le remplacement
+    enqueue_deletions(db, group_image_urls(group))
     group.image_url = image_url
+    group.image_variants = image_variants
     await db.commit()
     await db.refresh(group)
     
@@ -254,39 +258,72 @@ async def upload_docks_group_image(
 async def delete_docks_group_image_only(
     group_id: int,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    admin: AdminPrincipal = Depends(require_admin),
 ):
     group = await db.get(models.DocksGroup, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Docks group not found")
         
     if group.image_url:
-        storage_service.delete_image(group.image_url)
+        enqueue_deletions(db, group_image_urls(group))
         group.image_url = None
+        group.image_variants = None
         await db.commit()
     
     return Response(status_code=204)
 
 
+@router.put("/defect-reports/{report_id}", response_model=schemas.DefectReportResponse)
+async def update_defect_report(
+    report_id: int,
+    data: schemas.DefectReportStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    admin: AdminPrincipal = Depends(require_admin),
+):
+    """
+    Prise en charge ou résolution d'un signalement. Un signalement qui n'est plus en
+    attente est clos : le prochain signalement du groupe crée une nouvelle ligne et
+    un nouvel email.
+    """
+    report = await db.get(models.DefectReport, report_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Defect report not found")
+    if report.status not in ("pending", "in_progress"):
+        raise HTTPException(status_code=409, detail=f"Defect report already {report.status}")
+
+    report.status = data.status
+    await db.commit()
+    await db.refresh(report)
+    if report.group_id is not None:
+        forget_open_report(report.group_id)
+
+    return report
+
+
 @router.post("/change-password", status_code=204)
 async def change_admin_password(
     data: schemas.AdminChangePassword,
     db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin),
+    principal: AdminPrincipal = Depends(require_admin),
 ):
-    if not verify_password(data.old_password, admin.hashed_password):
+    admin = await db.get(models.Admin, principal.id)
+    # Compte supprimé mais encore actif dans le cache de require_admin
+    if admin is None:
+        raise HTTPException(status_code=401)
+
+    if not await verify_password_async(data.old_password, admin.hashed_password):
         raise HTTPException(
             status_code=403,
             detail="Mot de passe actuel incorrect"
         )
 
-    if verify_password(data.new_password, admin.hashed_password):
+    if await verify_password_async(data.new_password, admin.hashed_password):
         raise HTTPException(
             status_code=400,
             detail="Le nouveau mot de passe doit être différent"
         )
 
-    admin.hashed_password = get_password_hash(data.new_password)
+    admin.hashed_password = await get_password_hash_async(data.new_password)
     db.add(admin)
     await db.commit()
 
@@ -1,13 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.schemas import LoginRequest, TokenResponse
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 from app.core.jwt import create_admin_token
 from app.core.config import settings
 from app.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app import models
-from app.core.security import get_password_hash
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -26,7 +25,7 @@ async def login(
         raise HTTPException(status_code=401, detail="Utilisateur inconnu ou inactif")
     if not admin.is_active:
         raise HTTPException(status_code=401, detail="Compte administrateur inactif")
-    if not verify_password(data.password, admin.hashed_password):
+    if not await verify_password_async(data.password, admin.hashed_password):
         raise HTTPException(status_code=401, detail="Mot de passe incorrect")
 
     token = create_admin_token(admin.id)
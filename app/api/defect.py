@@ -1,67 +1,141 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, insert, literal, literal_column, text, String, DateTime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, UTC
 import logging
 from app.schemas import DefectReport
-from app.core.email import send_email_notification
+from app.core.config import settings
+from app.core.rate_limit import TokenBucketLimiter, client_ip
 from app.database import get_db
 from app import models
 
 router = APIRouter(prefix="/api/public", tags=["defect"])
 logger = logging.getLogger(__name__)
 
+defect_rate_limiter = TokenBucketLimiter(
+    rate_per_minute=settings.RATE_LIMIT_DEFECT_PER_MINUTE,
+    burst=settings.RATE_LIMIT_DEFECT_BURST
+)
 
-@router.post("/report-defect")
+def limit_defect_reports(request: Request):
+    """Endpoint public non authentifié : limite par IP avant toute écriture ou envoi d'email"""
+    if settings.RATE_LIMIT_ENABLED:
+        defect_rate_limiter.check(client_ip(request, settings.RATE_LIMIT_TRUSTED_PROXY_HOPS))
+
+# group_id -> id du signalement ouvert (status = 'pending'), pour les signalements répétés
+_open_reports: dict[int, int] = {}
+
+
+def forget_open_report(group_id: int):
+    """À appeler quand le signalement ouvert d'un groupe est clos (les autres workers s'en aperçoivent à l'UPDATE)"""
+    _open_reports.pop(group_id, None)
+
+
+@router.post("/report-defect", dependencies=[Depends(limit_defect_reports)])
 async def report_defect(
     report: DefectReport,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Endpoint pour signaler un groupe de docks défectueux.
-    Persiste le signalement en base et envoie un email à l'admin.
+    
+    Un seul signalement reste ouvert par groupe : tant qu'il est en attente (jusqu'à sa
+    prise en charge via PUT /api/admin/defect-reports/{id}), les signalements suivants
+    incrémentent son compteur au lieu de créer une nouvelle ligne et un nouvel email. La notification de l'admin est enregistrée avec le
+    signalement puis envoyée par le worker de notifications.
     """
-    # Vérifier que le groupe existe
-    group = await db.get(models.DocksGroup, report.group_id)
-    if not group:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Le groupe de docks avec l'ID {report.group_id} n'existe pas"
-        )
+    now = datetime.now(UTC)
     
-    # Créer et sauvegarder le rapport en base de données
     try:
-        defect_report = models.DefectReport(
-            group_id=report.group_id,
-            group_name=group.name,  # Sauvegarde du nom pour l'historique
-            location=report.location,
-            status="pending"
+        # Signalement ouvert connu : simple incrément, sans lecture du groupe
+        report_id = _open_reports.get(report.group_id)
+        if report_id is not None:
+            result = await db.execute(
+                update(models.DefectReport)
+                .where(
+                    models.DefectReport.id == report_id,
+                    # Groupe supprimé entre-temps : group_id passé à NULL, on retombe sur le 404
+                    models.DefectReport.group_id == report.group_id,
+                    models.DefectReport.status == "pending"
+                )
+                .values(report_count=models.DefectReport.report_count + 1, last_reported_at=now)
+                .returning(models.DefectReport.id, models.DefectReport.group_name, models.DefectReport.report_count)
+            )
+            row = result.first()
+            if row is not None:
+                await db.commit()
+                return _report_response(report.group_id, row.group_name, row.id, row.report_count)
+            # Signalement traité ou groupe supprimé entre-temps
+            forget_open_report(report.group_id)
+        
+        # Insertion (si le groupe existe) ou incrément du signalement ouvert, en une requête
+        stmt = pg_insert(models.DefectReport).from_select(
+            ["group_id", "group_name", "location", "status", "created_at", "report_count"],
+            select(
+                models.DocksGroup.id,
+                models.DocksGroup.name,  # Sauvegarde du nom pour l'historique
+                literal(report.location, String),
+                literal("pending"),
+                literal(now, DateTime(timezone=True)),
+                literal(1)
+            ).where(models.DocksGroup.id == report.group_id)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["group_id"],
+            index_where=text("status = 'pending'"),
+            set_={
+                "report_count": models.DefectReport.report_count + 1,
+                "last_reported_at": now,
+            }
+        ).returning(
+            models.DefectReport.id,
+            models.DefectReport.group_name,
+            models.DefectReport.report_count,
+            literal_column("(xmax = 0)").label("inserted")
         )
-        db.add(defect_report)
+        row = (await db.execute(stmt)).first()
+        
+        if row is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Le groupe de docks avec l'ID {report.group_id} n'existe pas"
+            )
+        
+        if row.inserted:
+            await db.execute(
+                insert(models.DefectNotification).values(
+                    report_id=row.id,
+                    group_id=report.group_id,
+                    group_name=row.group_name,
+                    location=report.location,
+                    created_at=now,
+                    next_attempt_at=now
+                )
+            )
         await db.commit()
-        await db.refresh(defect_report)
-        logger.info(f"Défaut signalé pour le groupe {group.name} (ID: {report.group_id}, rapport: {defect_report.id})")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de l'enregistrement du défaut pour le groupe {report.group_id}: {e}")
         raise HTTPException(
             status_code=500,
             detail="Erreur lors de l'enregistrement du signalement"
         )
+    
+    _open_reports[report.group_id] = row.id
+    if row.inserted:
+        logger.info(f"Défaut signalé pour le groupe {row.group_name} (ID: {report.group_id}, rapport: {row.id})")
+    
+    return _report_response(report.group_id, row.group_name, row.id, row.report_count)
 
-    # Envoyer l'email en arrière-plan (seulement en production)
-    try:
-        from app.core.config import settings
-        if settings.ENV == "production":
-            background_tasks.add_task(send_email_notification, report, group.name)
-            logger.info(f"Email de notification programmé pour le groupe {group.name}")
-        else:
-            logger.info(f"Email désactivé en {settings.ENV}")
-    except Exception as e:
-        logger.error(f"Erreur lors de l'envoi de l'email pour le groupe {report.group_id}: {e}")
 
+def _report_response(group_id: int, group_name: str, report_id: int, report_count: int):
     return {
         "status": "success",
         "message": "Signalement enregistré. L'administrateur sera notifié.",
-        "group_id": report.group_id,
-        "group_name": group.name,
-        "report_id": defect_report.id
-    }
\ No newline at end of file
+        "group_id": group_id,
+        "group_name": group_name,
+        "report_id": report_id,
+        "report_count": report_count
+    }
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, HTTPException
 from typing import Optional
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
-from app.database import get_db
-from app.core.security import require_admin
+from app.database import get_analytics_db, disable_statement_timeout
+from app.core.security import require_admin, AdminPrincipal
+from app.core.checkpoints import fleet_state_at
+from app.core.serialization import ORJSONResponse, format_timestamp
 from app import models
 from app import schemas
 
@@ -18,8 +20,8 @@ async def get_sensor_logs(
     limit: int = Query(100, ge=1, le=1000, description="Nombre maximum de logs à retourner"),
     start_date: Optional[str] = Query(None, description="Date de début au format YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="Date de fin au format YYYY-MM-DD"),
-    db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin)
+    db: AsyncSession = Depends(get_analytics_db),
+    admin: AdminPrincipal = Depends(require_admin)
 ):
     """
     Récupère l'historique des changements d'état des capteurs.
@@ -100,28 +102,28 @@ async def get_sensor_logs(
     result = await db.execute(query)
     rows = result.all()
     
-    # Formater les résultats
+    # Formater les résultats (dictionnaires sérialisés par orjson, sans revalidation)
     logs = [
-        schemas.SensorLogEntry(
-            id=row.id,
-            sensor_id=row.sensor_id,
-            sensor_name=row.name,
-            dock_id=row.dock_id,
-            status=row.status.value,
-            changed_at=row.changed_at.strftime("%Y-%m-%d %H:%M:%S")
-        )
+        {
+            "id": row.id,
+            "sensor_id": row.sensor_id,
+            "sensor_name": row.name,
+            "dock_id": row.dock_id,
+            "status": row.status.value,
+            "changed_at": format_timestamp(row.changed_at)
+        }
         for row in rows
     ]
     
-    return schemas.LogsResponse(total=total, logs=logs)
+    return ORJSONResponse({"total": total, "logs": logs})
 
 
 @router.get("/logs/sensor/{sensor_id}", summary="Historique d'un capteur spécifique")
 async def get_sensor_history(
     sensor_id: str,
     limit: int = Query(50, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin)
+    db: AsyncSession = Depends(get_analytics_db),
+    admin: AdminPrincipal = Depends(require_admin)
 ):
     """
     Récupère l'historique complet d'un capteur spécifique.
@@ -131,21 +133,123 @@ async def get_sensor_history(
     """
     return await get_sensor_logs(sensor_id=sensor_id, limit=limit, db=db)
 
+@router.get("/state-at", response_model=schemas.FleetStateResponse, summary="État de tous les docks à un instant donné")
+async def get_state_at(
+    ts: str = Query(..., description="Instant au format ISO 8601 (ex: 2026-01-22T14:30:00). UTC si pas de fuseau"),
+    db: AsyncSession = Depends(get_analytics_db),
+    admin: AdminPrincipal = Depends(require_admin)
+):
+    """
+    Reconstruit le statut de chaque dock à l'instant `ts` (revue d'incident).
+    
+    La relecture part de la dernière photographie périodique antérieure à `ts`,
+    ce qui borne le volume d'historique parcouru même pour des dates anciennes.
+    Ne sont pas inclus : les docks supprimés depuis, et ceux sans aucun changement
+    de statut enregistré jusqu'à `ts` (installés après, ou jamais sollicités).
+    
+    **Exemple :**
+    - `/api/admin/state-at?ts=2026-01-22T14:30:00`
+    """
+    try:
+        at = datetime.fromisoformat(ts)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format de date invalide (ISO 8601 attendu)")
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=ZoneInfo("UTC"))
+    
+    checkpoint_at, states = await fleet_state_at(db, at)
+    
+    return schemas.FleetStateResponse(
+        ts=at.strftime("%Y-%m-%d %H:%M:%S"),
+        checkpoint=checkpoint_at.strftime("%Y-%m-%d %H:%M:%S") if checkpoint_at else None,
+        docks=[
+            schemas.DockStateEntry(
+                dock_id=state["dock_id"],
+                sensor_id=state["sensor_id"],
+                dock_name=state["dock_name"],
+                status=state["status"].value,
+                changed_at=format_timestamp(state["changed_at"])
+            )
+            for state in states
+        ]
+    )
+
 @router.get("/logs/stats", summary="Statistiques des changements d'état")
 async def get_log_stats(
-    db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin)
+    fresh: bool = Query(False, description="Recalculer à partir de l'historique complet au lieu des compteurs"),
+    db: AsyncSession = Depends(get_analytics_db),
+    admin: AdminPrincipal = Depends(require_admin)
 ):
     """
     Récupère des statistiques sur les changements d'état des capteurs.
     
+    Par défaut, les statistiques sont lues depuis la table de compteurs
+    `dock_status_counters`, maintenue à chaque changement de statut (coût constant
+    quelle que soit la taille de l'historique). `?fresh=true` force un recalcul
+    exact sur `dock_status_history`.
+    
     **Retourne :**
     - Nombre total de changements
     - Répartition par statut
     - Capteurs les plus actifs
     - Période couverte
     """
+    if fresh:
+        # Parcours complet de l'historique, au-delà du statement_timeout des statistiques
+        await disable_statement_timeout(db)
+        return await _compute_log_stats_from_history(db)
+    return await _compute_log_stats_from_counters(db)
+
+
+async def _compute_log_stats_from_counters(db: AsyncSession):
+    counter = models.DockStatusCounter
+    
+    # Total et répartition par statut
+    status_query = select(
+        counter.status,
+        func.sum(counter.change_count).label('count')
+    ).group_by(counter.status)
+    status_result = await db.execute(status_query)
+    status_counts = {row.status.value: int(row.count) for row in status_result}
+    total = sum(status_counts.values())
+    
+    # Top capteurs les plus actifs
+    top_sensors_query = select(
+        models.Dock.sensor_id,
+        models.Dock.name,
+        func.sum(counter.change_count).label('changes')
+    ).join(
+        counter,
+        models.Dock.id == counter.dock_id
+    ).group_by(
+        models.Dock.sensor_id,
+        models.Dock.name
+    ).order_by(
+        func.sum(counter.change_count).desc()
+    ).limit(10)
     
+    top_result = await db.execute(top_sensors_query)
+    top_sensors = [
+        {
+            "sensor_id": row.sensor_id,
+            "sensor_name": row.name,
+            "total_changes": int(row.changes)
+        }
+        for row in top_result
+    ]
+    
+    # Période couverte
+    period_query = select(
+        func.min(counter.first_changed_at).label('oldest'),
+        func.max(counter.last_changed_at).label('newest')
+    )
+    period_result = await db.execute(period_query)
+    period = period_result.first()
+    
+    return _format_log_stats(total, status_counts, top_sensors, period)
+
+
+async def _compute_log_stats_from_history(db: AsyncSession):
     # Total de changements
     total_query = select(func.count()).select_from(models.DockStatusHistory)
     total_result = await db.execute(total_query)
@@ -192,6 +296,10 @@ async def get_log_stats(
     period_result = await db.execute(period_query)
     period = period_result.first()
     
+    return _format_log_stats(total, status_counts, top_sensors, period)
+
+
+def _format_log_stats(total, status_counts, top_sensors, period):
     return {
         "total_changes": total,
         "status_distribution": status_counts,
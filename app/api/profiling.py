@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from datetime import datetime, UTC
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.profiler import SamplingProfiler
+from app.core.security import require_admin, AdminPrincipal
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin", tags=["profiling"])
+
+# Un seul profilage à la fois par worker
+_profiling_lock = asyncio.Lock()
+
+@router.post("/profiling/sample", response_class=PlainTextResponse)
+async def sample_worker(
+    seconds: float = Query(10, gt=0, description="Durée de l'échantillonnage"),
+    interval_ms: float = Query(10, ge=1, le=1000, description="Intervalle entre deux échantillons"),
+    all_threads: bool = Query(False, description="Inclure les pools de threads (stockage, bcrypt)"),
+    include_idle: bool = Query(False, description="Inclure l'attente d'E/S de la boucle d'événements"),
+    admin: AdminPrincipal = Depends(require_admin),
+):
+    """
+    ## Profilage du worker qui traite la requête
+
+    Échantillonne les piles d'appels pendant `seconds` secondes sans interrompre le service
+    et retourne un fichier « collapsed stacks » (flamegraph.pl, speedscope.app).
+    Avec plusieurs workers, seul celui qui reçoit la requête est profilé.
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Durée maximale: {settings.PROFILER_MAX_SECONDS} secondes"
+        )
+    if _profiling_lock.locked():
+        raise HTTPException(status_code=409, detail="Un profilage est déjà en cours sur ce worker")
+
+    async with _profiling_lock:
+        interval = interval_ms / 1000
+        if all_threads:
+            profiler = SamplingProfiler.for_all_threads(interval=interval, include_idle=include_idle)
+        else:
+            # Thread courant : celui de la boucle d'événements
+            profiler = SamplingProfiler(interval=interval, include_idle=include_idle)
+
+        logger.info(f"Profilage démarré par l'admin {admin.id} pour {seconds} s")
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(profiler.stop)
+        logger.info(f"Profilage terminé: {profiler.samples} échantillon(s)")
+
+    filename = f"profile-{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
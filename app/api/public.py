@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
-from geoalchemy2.shape import to_shape
-from app.database import get_db
+import time
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from app.repositories import DocksRepository, get_read_docks_repository
+from app.core.change_feed import change_feed
+from app.core.config import settings
+from app.core.serialization import group_metadata, json_array_response
 from app import models, schemas
 
 router = APIRouter(prefix="/api/public", tags=["public"])
@@ -13,43 +14,125 @@ async def list_parking_groups(
     lat: float | None = None,
     lon: float | None = None,
     radius_meters: int = 1000,
-    db: AsyncSession = Depends(get_db),
+    repository: DocksRepository = Depends(get_read_docks_repository),
 ):
-    query = select(models.DocksGroup).options(selectinload(models.DocksGroup.docks))
-
-    if lat is not None and lon is not None:
-        user_point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
-        query = query.where(
-            func.ST_DWithin(
-                models.DocksGroup.location,
-                user_point,
-                radius_meters
-            )
+    groups = await repository.list_groups(lat, lon, radius_meters)
+
+    # Réponse sérialisée directement (response_model sert à la documentation)
+    return json_array_response([
+        group_metadata(group) + b',"total_docks":%d,"available_docks":%d}' % (
+            len(group.docks),
+            sum(1 for s in group.docks if s.status == models.DockStatus.AVAILABLE),
         )
+        for group in groups
+    ])
 
 
-    result = await db.execute(query)
-    groups = result.scalars().all()
+def _check_subscriber_capacity():
+    """Refuse (503) un nouveau client SSE / long-poll au-delà de CHANGE_FEED_MAX_SUBSCRIBERS"""
+    if change_feed.subscribers >= settings.CHANGE_FEED_MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=503,
+            detail="Trop de clients en attente de changements, réessayez plus tard",
+            headers={"Retry-After": str(int(settings.CHANGE_FEED_POLL_TIMEOUT_SECONDS))}
+        )
 
-    response = []
 
-    for group in groups:
-        point = to_shape(group.location)
+def _changes_response(version: int, reset: bool, changes: list[tuple[int, bytes]]) -> Response:
+    body = b'{"version":"%s","reset":%s,"changes":[%s]}' % (
+        change_feed.token(version).encode(), b"true" if reset else b"false", b",".join(payload for _, payload in changes)
+    )
+    return Response(content=body, media_type="application/json")
 
-        total = len(group.docks)
-        available = sum(
-            1 for s in group.docks if s.status == models.DockStatus.AVAILABLE
-        )
 
-        response.append({
-            "id": group.id,
-            "name": group.name,
-            "description": group.description,
-            "image_url": group.image_url,
-            "latitude": point.y,
-            "longitude": point.x,
-            "total_docks": total,
-            "available_docks": available,
-        })
-
-    return response
\ No newline at end of file
+@router.get("/docks/changes")
+async def poll_dock_changes(
+    since: str | None = Query(None, max_length=64, description="Dernière version reçue"),
+    group_id: list[int] | None = Query(None, description="Limiter à certains groupes"),
+    timeout: float = Query(
+        settings.CHANGE_FEED_POLL_TIMEOUT_SECONDS, ge=0, le=settings.CHANGE_FEED_POLL_TIMEOUT_SECONDS
+    ),
+):
+    """
+    Long-poll des changements de statut postérieurs à `since`, pour les clients sans WebSocket.
+
+    Répond dès qu'un changement est disponible, sinon après `timeout` secondes avec une
+    liste vide. Le client relance avec la `version` reçue. Sans `since`, ou avec
+    `reset: true`, le client recharge l'état complet (/docks-groups) : appeler d'abord
+    cet endpoint sans `since`, puis /docks-groups, pour ne manquer aucun changement.
+    """
+    version = change_feed.parse_token(since) if since is not None else None
+    if version is None:
+        return _changes_response(change_feed.version, True, [])
+    since = version
+
+    _check_subscriber_capacity()
+    groups = set(group_id) if group_id else None
+    deadline = time.monotonic() + timeout
+    change_feed.subscribers += 1
+    try:
+        while True:
+            version = change_feed.version
+            changes, reset = change_feed.changes_since(since, groups)
+            if changes or reset:
+                return _changes_response(version, reset, changes)
+            # Changements d'autres groupes : la position du client avance quand même
+            since = version
+            if not await change_feed.wait(since, deadline - time.monotonic()):
+                return _changes_response(change_feed.version, False, [])
+    finally:
+        change_feed.subscribers -= 1
+
+
+@router.get("/docks/stream")
+async def stream_dock_changes(
+    since: str | None = Query(None, max_length=64, description="Reprendre après cette version"),
+    group_id: list[int] | None = Query(None, description="Limiter à certains groupes"),
+    last_event_id: str | None = Header(None),
+):
+    """
+    Flux Server-Sent Events des changements de statut (événements `change`, `id` = jeton de version).
+
+    Un événement `reset` signale des changements perdus : le client recharge l'état complet.
+    Au-delà de CHANGE_FEED_MAX_SUBSCRIBERS clients en attente, la connexion est refusée (503).
+    À la reconnexion, le navigateur renvoie Last-Event-ID et le flux reprend après.
+    """
+    # Comptés au démarrage du flux : limite approximative lors d'une rafale de connexions
+    _check_subscriber_capacity()
+    groups = set(group_id) if group_id else None
+    token = last_event_id or since
+    if token is None:
+        since = change_feed.version
+    else:
+        # Jeton d'un autre worker ou d'avant un redémarrage : -1 force un événement reset
+        version = change_feed.parse_token(token)
+        since = version if version is not None else -1
+
+    async def events():
+        nonlocal since
+        change_feed.subscribers += 1
+        try:
+            while True:
+                version = change_feed.version
+                changes, reset = change_feed.changes_since(since, groups)
+                if reset:
+                    # id : à la reconnexion, Last-Event-ID repart de la version courante
+                    token = change_feed.token(version).encode()
+                    yield b'id: %s\nevent: reset\ndata: {"version":"%s"}\n\n' % (token, token)
+                elif changes:
+                    yield b"".join(
+                        b"id: %s\nevent: change\ndata: %s\n\n" % (change_feed.token(change_version).encode(), payload)
+                        for change_version, payload in changes
+                    )
+                since = version
+                if not await change_feed.wait(since, settings.CHANGE_FEED_HEARTBEAT_SECONDS):
+                    # Maintient la connexion à travers les proxys
+                    yield b": ping\n\n"
+        finally:
+            change_feed.subscribers -= 1
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
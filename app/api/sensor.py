@@ -1,25 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, select
+from fastapi import APIRouter, Depends, HTTPException, Request
 import logging
-from app.database import get_db
+from datetime import datetime, UTC
+from app.repositories import DocksRepository, get_docks_repository
 from app.core.security import require_sensor_key
+from app.core.config import settings
+from app.core.rate_limit import TokenBucketLimiter, client_ip
+from app.core import metrics
 from app import models, schemas, websockets
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/sensor", tags=["sensor"])
 
-@router.post("/update")
+sensor_rate_limiter = TokenBucketLimiter(
+    rate_per_minute=settings.RATE_LIMIT_SENSOR_PER_MINUTE,
+    burst=settings.RATE_LIMIT_SENSOR_BURST
+)
+sensor_client_rate_limiter = TokenBucketLimiter(
+    rate_per_minute=settings.RATE_LIMIT_SENSOR_CLIENT_PER_MINUTE,
+    burst=settings.RATE_LIMIT_SENSOR_CLIENT_BURST
+)
+
+def limit_sensor_clients(request: Request):
+    """
+    Rejette (429) un client trop bavard avant toute authentification ou requête en base.
+    Clé : l'IP, et non le sensor_id du corps, qui n'est pas encore authentifié
+    """
+    if settings.RATE_LIMIT_ENABLED:
+        sensor_client_rate_limiter.check(client_ip(request, settings.RATE_LIMIT_TRUSTED_PROXY_HOPS))
+
+@router.post("/update", dependencies=[Depends(limit_sensor_clients)])
 async def update_sensor(
     data: schemas.SensorUpdate,
-    db: AsyncSession = Depends(get_db),
-    sensor=Depends(require_sensor_key)
+    repository: DocksRepository = Depends(get_docks_repository),
+    sensor_id: str | None = Depends(require_sensor_key)
 ):
-    result = await db.execute(
-        select(models.Dock).where(models.Dock.sensor_id == data.sensor_id)
-    )
-    dock = result.scalars().first()
+    # Une clé individuelle n'autorise que la mise à jour de son propre capteur
+    if sensor_id is not None and sensor_id != data.sensor_id:
+        raise HTTPException(status_code=403, detail="Clé non associée à ce capteur")
+
+    # Limite par capteur une fois authentifié (clé partagée : sensor_id déclaré par son détenteur)
+    if settings.RATE_LIMIT_ENABLED:
+        sensor_rate_limiter.check(sensor_id or data.sensor_id)
+    
+    dock = await repository.get_dock_by_sensor(data.sensor_id)
     
     if not dock:
         raise HTTPException(status_code=404, detail="Dock non trouvé")
@@ -37,23 +61,12 @@ async def update_sensor(
     
     if old_status == data.status:
         logger.debug(f"Statut inchangé pour dock {dock.id}: {old_status.value}")
+        metrics.sensor_updates.labels("unchanged").inc()
         return {"status": "ok", "changed": False}
     
-    await db.execute(
-        update(models.Dock)
-        .where(models.Dock.sensor_id == data.sensor_id)
-        .values(status=data.status)
-    )
-    
-    history_entry = models.DockStatusHistory(
-        dock_id=dock.id,
-        sensor_id=dock.sensor_id,
-        dock_name=dock.name,
-        status=data.status
-    )
-    db.add(history_entry)
-    
-    await db.commit()
+    changed_at = datetime.now(UTC)
+    await repository.change_dock_status(dock, data.status, changed_at)
+    metrics.sensor_updates.labels("changed").inc()
     
     try:
         await websockets.manager.broadcast({
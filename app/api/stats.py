@@ -1,8 +1,9 @@
 from sqlalchemy import select, func
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
-from app.core.security import require_admin
+from app.database import get_analytics_db
+from app.core.security import require_admin, AdminPrincipal
+from app.core.usage import occupied_seconds_by_day
 from app import models, schemas
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
@@ -10,7 +11,7 @@ from zoneinfo import ZoneInfo
 router = APIRouter(prefix="/api/admin", tags=["stats"])
 
 @router.get("/stats/sensors", response_model=schemas.SensorStatsResponse)
-async def get_sensors_statistics(db: AsyncSession = Depends(get_db), admin: models.Admin = Depends(require_admin)):
+async def get_sensors_statistics(db: AsyncSession = Depends(get_analytics_db), admin: AdminPrincipal = Depends(require_admin)):
     """
     ## Statistiques globales des capteurs
     
@@ -107,8 +108,8 @@ async def get_usage_by_day(
         description="Date de fin au format YYYY-MM-DD. Par défaut : aujourd'hui",
         example="2026-01-20"
     ),
-    db: AsyncSession = Depends(get_db),
-    admin: models.Admin = Depends(require_admin)
+    db: AsyncSession = Depends(get_analytics_db),
+    admin: AdminPrincipal = Depends(require_admin)
 ):
     """
     ## Temps d'utilisation de chaque capteur par jour
@@ -189,63 +190,20 @@ async def get_usage_by_day(
         history_result = await db.execute(history_query)
         history = history_result.scalars().all()
         
-        # Calculer l'utilisation par jour
-        daily_usage = {}
-        current_date = start.date()
-        end_date_obj = end.date()
-        
-        while current_date <= end_date_obj:
-            daily_usage[current_date] = 0
-            current_date += timedelta(days=1)
-        
         # Déterminer le statut initial de la période
         if last_before:
             previous_status = last_before.status
         else:
             # Aucun historique avant, on suppose AVAILABLE par défaut
             previous_status = models.DockStatus.AVAILABLE
-        
-        previous_time = start
-        
-        for entry in history:
-            # Si le statut précédent était OCCUPIED, ajouter le temps
-            if previous_status == models.DockStatus.OCCUPIED:
-                time_diff = (entry.changed_at - previous_time).total_seconds()
-                entry_date = previous_time.date()
-                
-                # Si le changement de statut chevauche plusieurs jours
-                current_time = previous_time
-                while current_time.date() <= entry.changed_at.date():
-                    day_end = datetime.combine(current_time.date(), datetime.max.time(), tzinfo=ZoneInfo("UTC"))
-                    day_end = day_end.replace(hour=23, minute=59, second=59)
-                    
-                    segment_end = min(entry.changed_at, day_end)
-                    segment_seconds = (segment_end - current_time).total_seconds()
-                    
-                    if current_time.date() in daily_usage:
-                        daily_usage[current_time.date()] += segment_seconds
-                    
-                    current_time = day_end + timedelta(seconds=1)
-            
-            previous_status = entry.status
-            previous_time = entry.changed_at
-        
-        # Ajouter le temps jusqu'à maintenant si le statut actuel est OCCUPIED
-        if previous_status == models.DockStatus.OCCUPIED and previous_time < end:
-            time_diff = (end - previous_time).total_seconds()
-            
-            current_time = previous_time
-            while current_time.date() <= end.date():
-                day_end = datetime.combine(current_time.date(), datetime.max.time(), tzinfo=ZoneInfo("UTC"))
-                day_end = day_end.replace(hour=23, minute=59, second=59)
-                
-                segment_end = min(end, day_end)
-                segment_seconds = (segment_end - current_time).total_seconds()
-                
-                if current_time.date() in daily_usage:
-                    daily_usage[current_time.date()] += segment_seconds
-                
-                current_time = day_end + timedelta(seconds=1)
+
+        # Calculer l'utilisation par jour
+        daily_usage = occupied_seconds_by_day(
+            previous_status,
+            ((entry.changed_at, entry.status) for entry in history),
+            start,
+            end
+        )
         
         # Formater la réponse
         daily_usage_list = [
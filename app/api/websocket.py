@@ -8,7 +8,12 @@ router = APIRouter()
 
 @router.websocket("/ws/docks")
 async def ws_docks(websocket: WebSocket):
-    await manager.connect(websocket)
+    """
+    Changements de statut en direct : JSON par défaut, ou ?format=binary pour des trames
+    regroupant des enregistrements struct "<IIIB" (version, dock_id, group_id, statut :
+    0 libre, 1 occupé, 2 hors service)
+    """
+    await manager.connect(websocket, binary=websocket.query_params.get("format") == "binary")
     try:
         while True:
             await websocket.receive_text()
@@ -0,0 +1,93 @@
+"""
+Flux versionné des changements de statut des docks
+
+Chaque message diffusé par ConnectionManager.broadcast reçoit un numéro de version
+croissant et est conservé, déjà sérialisé, dans un tampon circulaire. Les clients
+SSE et long-poll reprennent à partir de la dernière version reçue et ne reçoivent
+que les changements suivants.
+
+Comme les connexions WebSocket, le flux est local au worker et les numéros repartent
+de 0 à chaque démarrage. Les clients manipulent donc un jeton "<époque>-<version>",
+l'époque étant tirée au hasard par processus : un jeton d'un autre worker ou d'avant
+un redémarrage est rejeté (reset=true) et le client recharge l'état complet.
+"""
+import asyncio
+import secrets
+import time
+from collections import deque
+
+import orjson
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class ChangeFeed:
+
+    def __init__(self, maxlen: int, epoch: str | None = None):
+        self.epoch = epoch or secrets.token_hex(4)
+        self.version = 0
+        self.subscribers = 0
+        # (version, group_id, changement sérialisé)
+        self._changes: deque[tuple[int, int, bytes]] = deque(maxlen=maxlen)
+        self._published = asyncio.Event()
+
+    def publish(self, change: dict) -> int:
+        """Ajoute un changement et réveille les clients en attente"""
+        self.version += 1
+        self._changes.append((
+            self.version,
+            change["group_id"],
+            orjson.dumps({"version": self.token(self.version), **change}),
+        ))
+        # Un nouvel événement par publication : les attentes en cours sont toutes réveillées
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+        return self.version
+
+    def token(self, version: int) -> str:
+        """Jeton de reprise transmis aux clients (`version` long-poll, `id` SSE)"""
+        return f"{self.epoch}-{version}"
+
+    def parse_token(self, token: str) -> int | None:
+        """Version désignée par un jeton, ou None s'il vient d'un autre processus ou est invalide"""
+        epoch, _, version = token.rpartition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def changes_since(self, since: int, group_ids: set[int] | None = None) -> tuple[list[tuple[int, bytes]], bool]:
+        """
+        Changements postérieurs à `since`, éventuellement limités à certains groupes,
+        et si le client doit recharger l'état complet (changements perdus ou version inconnue)
+        """
+        oldest = self._changes[0][0] if self._changes else self.version + 1
+        if since > self.version or since < oldest - 1:
+            return [], True
+
+        changes = []
+        # Parcours depuis la fin : les clients à jour ne lisent que les derniers éléments
+        for version, group_id, payload in reversed(self._changes):
+            if version <= since:
+                break
+            if group_ids is None or group_id in group_ids:
+                changes.append((version, payload))
+        changes.reverse()
+        return changes, False
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """Attend une version postérieure à `since` ; False à l'expiration du délai"""
+        deadline = time.monotonic() + timeout
+        while self.version <= since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._published.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+change_feed = ChangeFeed(maxlen=settings.CHANGE_FEED_SIZE)
+metrics.change_feed_subscribers.set_function(lambda: change_feed.subscribers)
@@ -0,0 +1,136 @@
+"""
+Reconstruction de l'état de la flotte à une date donnée, avec photographies périodiques
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import select, func, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from app.database import AnalyticsSessionLocal, disable_statement_timeout
+
+logger = logging.getLogger(__name__)
+
+# Verrou consultatif Postgres : un seul worker prend la photographie
+_CHECKPOINT_LOCK_ID = 260027
+
+
+async def fleet_state_at(db: AsyncSession, ts: datetime) -> tuple[datetime | None, list[dict]]:
+    """
+    Reconstruit le statut de chaque dock à l'instant `ts`.
+
+    Part de la dernière photographie antérieure à `ts` puis rejoue uniquement les
+    changements survenus depuis, via une seule requête DISTINCT ON (dock_id)
+    appuyée sur l'index (dock_id, changed_at). Au-delà de la rétention des
+    photographies, tout l'historique jusqu'à `ts` est relu.
+
+    Les docks sans aucun changement de statut jusqu'à `ts` sont omis : sans date de
+    création, impossible de savoir s'ils existaient déjà et dans quel état.
+
+    Returns:
+        La date de la photographie utilisée (ou None) et la liste des états par dock
+    """
+    checkpoint_query = select(func.max(models.DockStatusCheckpoint.taken_at)).where(
+        models.DockStatusCheckpoint.taken_at <= ts
+    )
+    checkpoint_at = (await db.execute(checkpoint_query)).scalar()
+
+    states: dict[int, dict] = {}
+
+    if checkpoint_at is not None:
+        checkpoint_result = await db.execute(
+            select(models.DockStatusCheckpoint).where(
+                models.DockStatusCheckpoint.taken_at == checkpoint_at,
+                models.DockStatusCheckpoint.dock_id.is_not(None)
+            )
+        )
+        for row in checkpoint_result.scalars():
+            states[row.dock_id] = {
+                "dock_id": row.dock_id,
+                "sensor_id": row.sensor_id,
+                "dock_name": row.dock_name,
+                "status": row.status,
+                "changed_at": row.changed_at,
+            }
+
+    history = models.DockStatusHistory
+    filters = [history.dock_id.is_not(None), history.changed_at <= ts]
+    if checkpoint_at is not None:
+        filters.append(history.changed_at > checkpoint_at)
+
+    # Historique des docks supprimés (dock_id NULL) : non rattachable à un dock, ignoré
+    latest_query = select(
+        history.dock_id,
+        history.sensor_id,
+        history.dock_name,
+        history.status,
+        history.changed_at
+    ).where(*filters).distinct(history.dock_id).order_by(
+        history.dock_id,
+        history.changed_at.desc()
+    )
+    for row in await db.execute(latest_query):
+        states[row.dock_id] = {
+            "dock_id": row.dock_id,
+            "sensor_id": row.sensor_id,
+            "dock_name": row.dock_name,
+            "status": row.status,
+            "changed_at": row.changed_at,
+        }
+
+    return checkpoint_at, [states[dock_id] for dock_id in sorted(states)]
+
+
+async def take_checkpoint(db: AsyncSession, taken_at: datetime):
+    """
+    Enregistre une photographie de la flotte à `taken_at`, calculée de façon
+    incrémentale à partir de la photographie précédente (la première relit
+    tout l'historique : pas de statement_timeout)
+    """
+    await disable_statement_timeout(db)
+    _, states = await fleet_state_at(db, taken_at)
+    if states:
+        await db.execute(
+            insert(models.DockStatusCheckpoint),
+            [{"taken_at": taken_at, **state} for state in states]
+        )
+    logger.info(f"Photographie de l'état des docks prise à {taken_at.isoformat()} ({len(states)} docks)")
+
+
+async def _checkpoint_if_due():
+    interval = timedelta(hours=settings.STATE_CHECKPOINT_INTERVAL_HOURS)
+    # Décalage pour ne pas figer une photographie avant la fin des transactions en cours
+    taken_at = datetime.now(UTC) - timedelta(minutes=settings.STATE_CHECKPOINT_LAG_MINUTES)
+
+    async with AnalyticsSessionLocal() as db:
+        await db.execute(select(func.pg_advisory_xact_lock(_CHECKPOINT_LOCK_ID)))
+        last = (await db.execute(select(func.max(models.DockStatusCheckpoint.taken_at)))).scalar()
+        if last is None or taken_at - last >= interval:
+            await take_checkpoint(db, taken_at)
+            if settings.STATE_CHECKPOINT_RETENTION_DAYS:
+                # Seule la dernière photographie avant `ts` est relue : les anciennes ne servent qu'aux dates lointaines
+                result = await db.execute(
+                    delete(models.DockStatusCheckpoint).where(
+                        models.DockStatusCheckpoint.taken_at
+                        < taken_at - timedelta(days=settings.STATE_CHECKPOINT_RETENTION_DAYS)
+                    )
+                )
+                if result.rowcount:
+                    logger.info(f"{result.rowcount} ligne(s) de photographies expirées supprimée(s)")
+        await db.commit()
+
+
+async def run_checkpoint_loop():
+    """Tâche de fond : prend une photographie dès que la précédente est plus vieille que l'intervalle"""
+    while True:
+        try:
+            await _checkpoint_if_due()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erreur lors de la photographie de l'état des docks: {e}", exc_info=True)
+        # Vérification fréquente : une photographie manquée est rattrapée rapidement
+        await asyncio.sleep(min(3600, settings.STATE_CHECKPOINT_INTERVAL_HOURS * 3600))
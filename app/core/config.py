@@ -5,11 +5,79 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
 
+    # Endpoint /metrics (format Prometheus) : désactivé par défaut, à protéger par un jeton
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str = ""  # Authorization: Bearer <jeton> exigé s'il est renseigné
+
+    # Temps base de données par requête (en-tête Server-Timing) et journal des requêtes lentes
+    SERVER_TIMING_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: int = 500  # 0 : journal désactivé
+
+    # Profileur par échantillonnage (/api/admin/profiling/sample)
+    PROFILER_MAX_SECONDS: int = 60
+
+    # Pool principal (capteurs, routes publiques, administration courante)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 10  # Attente maximale d'une connexion libre
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # 0 derrière PgBouncer en mode transaction
+    DB_STATEMENT_TIMEOUT_MS: int = 5000
+
+    # Pool séparé pour l'historique et les statistiques
+    DB_ANALYTICS_POOL_SIZE: int = 3
+    DB_ANALYTICS_MAX_OVERFLOW: int = 2
+    DB_ANALYTICS_STATEMENT_TIMEOUT_MS: int = 30000
+
+    # Réplicas en lecture seule (URLs séparées par des virgules, vide : tout sur le primaire)
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_HEALTH_CHECK_SECONDS: int = 10
+    DB_REPLICA_MAX_LAG_SECONDS: int = 30
+
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 60
 
+    # Cache des administrateurs actifs (require_admin)
+    ADMIN_CACHE_TTL_SECONDS: int = 30  # Délai de prise en compte d'une désactivation sur tous les workers
+    ADMIN_CACHE_MAX_SIZE: int = 1024
+
+    # Nombre maximal de hachages bcrypt simultanés (pool dédié)
+    PASSWORD_HASH_WORKERS: int = 2
+
     SENSOR_API_KEY: str
+    # Clé partagée historique, à désactiver une fois tous les capteurs provisionnés
+    SENSOR_SHARED_KEY_ENABLED: bool = True
+    # Cache des clés individuelles (révocation effective au plus tard après le TTL)
+    SENSOR_KEY_CACHE_TTL_SECONDS: int = 300
+    SENSOR_KEY_NEGATIVE_CACHE_TTL_SECONDS: int = 60
+    SENSOR_KEY_CACHE_MAX_SIZE: int = 10000
+
+    # Photographies périodiques des statuts (reconstruction de l'état à une date)
+    STATE_CHECKPOINT_INTERVAL_HOURS: int = 24
+    STATE_CHECKPOINT_LAG_MINUTES: int = 5
+    STATE_CHECKPOINT_RETENTION_DAYS: int = 90  # Photographies plus anciennes supprimées (0 : conservées)
+
+    # Trames binaires de /ws/docks (?format=binary) : changements regroupés sur cette fenêtre
+    WEBSOCKET_BATCH_WINDOW_MS: int = 50
+
+    # Flux des changements de statut (SSE et long-poll, alternatives à /ws/docks)
+    CHANGE_FEED_SIZE: int = 10000  # Changements conservés pour la reprise des clients
+    CHANGE_FEED_POLL_TIMEOUT_SECONDS: float = 25  # Attente maximale d'un long-poll
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15  # Commentaire SSE envoyé en l'absence de changement
+    CHANGE_FEED_MAX_SUBSCRIBERS: int = 1000  # Clients SSE et long-poll simultanés par worker (503 au-delà)
+
+    # Limitation de débit (jetons par minute et rafale maximale, par route)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_SENSOR_PER_MINUTE: float = 60
+    RATE_LIMIT_SENSOR_BURST: int = 10
+    # Avant authentification, par IP (une passerelle peut relayer de nombreux capteurs)
+    RATE_LIMIT_SENSOR_CLIENT_PER_MINUTE: float = 1200
+    RATE_LIMIT_SENSOR_CLIENT_BURST: int = 200
+    RATE_LIMIT_DEFECT_PER_MINUTE: float = 2
+    RATE_LIMIT_DEFECT_BURST: int = 5
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 0  # Reverse proxies devant l'application (0 : X-Forwarded-For ignoré)
 
     # Email configuration
     MAIL_USERNAME: str
@@ -18,8 +86,18 @@ class Settings(BaseSettings):
     MAIL_PORT: int = 587
     MAIL_SERVER: str
     MAIL_FROM_NAME: str = "Wheelock Application"
+    MAIL_STARTTLS: bool = True
+    MAIL_USE_CREDENTIALS: bool = True  # False pour un serveur SMTP local de test
+    MAIL_TIMEOUT_SECONDS: int = 30
+    MAIL_ENABLED: bool | None = None  # None : envoi uniquement si ENV == "production"
     ADMIN_EMAIL: str
 
+    # File des notifications de signalement (regroupement par groupe de docks)
+    MAIL_DIGEST_WINDOW_SECONDS: int = 300
+    MAIL_OUTBOX_POLL_SECONDS: int = 15
+    MAIL_MAX_BACKOFF_SECONDS: int = 3600
+    MAIL_OUTBOX_CLAIM_SECONDS: int = 300  # Notifications réservées par un worker ; reprises après ce délai s'il s'arrête
+
     # MinIO / S3 Configuration
     MINIO_ENDPOINT: str = "http://minio:9000"
     MINIO_ACCESS_KEY: str = "minioadmin"
@@ -27,6 +105,24 @@ class Settings(BaseSettings):
     MINIO_BUCKET_NAME: str = "images-public"
     MINIO_USE_SSL: bool = False
     MINIO_PUBLIC_ENDPOINT: str = "http://10.8.19.72:9000"  # Pour les URLs publiques
+    MINIO_PRIVATE_BUCKET: bool = False  # Images servies par URLs pré-signées
+    PRESIGNED_URL_EXPIRATION_SECONDS: int = 3600
+    PRESIGNED_URL_SAFETY_MARGIN_SECONDS: int = 300  # Validité minimale restante d'une URL réutilisée
+    PRESIGNED_URL_CACHE_SIZE: int = 10000
+    GROUP_PAYLOAD_CACHE_SIZE: int = 10000  # Métadonnées de groupes déjà sérialisées
+    GROUP_PAYLOAD_CACHE_TTL_SECONDS: int = 600
+    STORAGE_MAX_CONNECTIONS: int = 10  # Connexions HTTP et threads dédiés au client S3
+    STORAGE_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    STORAGE_UPLOAD_CHUNK_BYTES: int = 8 * 1024 * 1024  # Taille des parts multipart (5 Mo minimum pour S3)
+    IMAGE_PROCESS_WORKERS: int = 2  # Processus dédiés à la génération des déclinaisons d'images
+
+    # Suppression différée des objets (file storage_deletions) et nettoyage des orphelins
+    STORAGE_DELETION_BATCH_SIZE: int = 1000  # Maximum accepté par DeleteObjects
+    STORAGE_DELETION_POLL_SECONDS: int = 10
+    STORAGE_DELETION_MAX_BACKOFF_SECONDS: int = 3600
+    STORAGE_DELETION_CLAIM_SECONDS: int = 300  # Lot réservé par un worker ; repris après ce délai s'il s'arrête
+    STORAGE_RECONCILE_INTERVAL_HOURS: int = 24
+    STORAGE_ORPHAN_GRACE_HOURS: int = 1  # Laisse le temps aux uploads en cours d'être enregistrés
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,160 @@
+"""
+Envoi différé des notifications de signalement (file defect_notifications)
+
+report_defect enregistre la notification dans la même transaction que le
+signalement. Un worker unique par processus envoie les emails via une
+connexion SMTP persistante et regroupe en un seul email tous les signalements
+d'un même groupe reçus pendant MAIL_DIGEST_WINDOW_SECONDS.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import select, update
+
+from app import models
+from app.core import metrics
+from app.core.config import settings
+from app.core.email import SMTPSender, build_defect_digest
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 500
+
+
+def mail_enabled() -> bool:
+    if settings.MAIL_ENABLED is not None:
+        return settings.MAIL_ENABLED
+    return settings.ENV == "production"
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(settings.MAIL_MAX_BACKOFF_SECONDS, 30 * 2 ** attempts))
+
+
+async def _claim_digests(now: datetime) -> list[tuple[int | None, str, list[tuple[int, int, datetime, str | None]]]]:
+    """
+    Réserve les notifications des groupes dont la fenêtre de regroupement est close en
+    repoussant leur prochaine tentative, puis valide : aucun verrou n'est conservé pendant
+    l'envoi SMTP. Des notifications dont le worker s'arrête redeviennent disponibles
+    après MAIL_OUTBOX_CLAIM_SECONDS.
+
+    Returns:
+        (group_id, group_name, [(id, attempts, created_at, location)]) par récapitulatif
+    """
+    window_start = now - timedelta(seconds=settings.MAIL_DIGEST_WINDOW_SECONDS)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.DefectNotification)
+            .where(
+                models.DefectNotification.sent_at.is_(None),
+                models.DefectNotification.next_attempt_at <= now
+            )
+            .order_by(models.DefectNotification.created_at)
+            .limit(OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        by_group = defaultdict(list)
+        for notification in result.scalars():
+            by_group[notification.group_id].append(notification)
+
+        digests = []
+        for group_id, notifications in by_group.items():
+            # Fenêtre encore ouverte : d'autres signalements peuvent rejoindre ce récapitulatif
+            if notifications[0].created_at > window_start:
+                continue
+            digests.append((
+                group_id,
+                notifications[-1].group_name or f"#{group_id}",
+                [(n.id, n.attempts, n.created_at, n.location) for n in notifications]
+            ))
+
+        if digests:
+            await db.execute(
+                update(models.DefectNotification)
+                .where(models.DefectNotification.id.in_([row[0] for _, _, rows in digests for row in rows]))
+                .values(next_attempt_at=now + timedelta(seconds=settings.MAIL_OUTBOX_CLAIM_SECONDS))
+            )
+            await db.commit()
+    return digests
+
+
+async def process_outbox(sender: SMTPSender) -> int:
+    """
+    Envoie un email récapitulatif par groupe dont le premier signalement en attente
+    est plus ancien que la fenêtre de regroupement, en trois temps : réservation
+    (transaction courte), envoi hors transaction, puis enregistrement du résultat.
+
+    Returns:
+        Le nombre de notifications envoyées
+    """
+    digests = await _claim_digests(datetime.now(UTC))
+    if not digests:
+        return 0
+
+    sent_ids = []
+    # Échecs regroupés par (tentatives, erreur) : une requête par valeur distincte
+    failures = defaultdict(list)
+    for group_id, group_name, rows in digests:
+        try:
+            if mail_enabled():
+                message = build_defect_digest(
+                    group_name,
+                    group_id,
+                    [(created_at, location) for _, _, created_at, location in rows]
+                )
+                started = time.perf_counter()
+                await sender.send(message)
+                metrics.email_send_duration.observe(time.perf_counter() - started)
+                logger.info(f"Email envoyé pour le groupe {group_name} ({len(rows)} signalement(s))")
+            else:
+                logger.info(f"Email désactivé en {settings.ENV} pour le groupe {group_name}")
+        except Exception as e:
+            logger.error(f"Erreur lors de l'envoi de l'email pour le groupe {group_id}: {e}")
+            metrics.email_send_failures.inc()
+            for row_id, attempts, _, _ in rows:
+                failures[(attempts, str(e)[:1000])].append(row_id)
+            continue
+        sent_ids.extend(row_id for row_id, _, _, _ in rows)
+
+    now = datetime.now(UTC)
+    async with AsyncSessionLocal() as db:
+        if sent_ids:
+            await db.execute(
+                update(models.DefectNotification)
+                .where(models.DefectNotification.id.in_(sent_ids))
+                .values(sent_at=now)
+            )
+        for (attempts, error), row_ids in failures.items():
+            await db.execute(
+                update(models.DefectNotification)
+                .where(models.DefectNotification.id.in_(row_ids))
+                .values(
+                    attempts=attempts + 1,
+                    next_attempt_at=now + _backoff(attempts + 1),
+                    last_error=error
+                )
+            )
+        await db.commit()
+
+    return len(sent_ids)
+
+
+async def run_notification_worker():
+    """Tâche de fond : vide la file des notifications avec une connexion SMTP persistante"""
+    sender = SMTPSender()
+    try:
+        while True:
+            try:
+                await process_outbox(sender)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement des notifications: {e}", exc_info=True)
+            await asyncio.sleep(settings.MAIL_OUTBOX_POLL_SECONDS)
+    finally:
+        await sender.close()
@@ -1,69 +1,141 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from app.core.config import settings
-from app.schemas import DefectReport
+"""
+Envoi des notifications email à l'administrateur
+"""
+import logging
+from datetime import datetime
+from email.message import EmailMessage
+from html import escape
+from typing import TYPE_CHECKING
 
+from app.core.config import settings
 
-# Configuration email
-email_conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-)
+if TYPE_CHECKING:
+    import aiosmtplib
 
-fm = FastMail(email_conf)
+logger = logging.getLogger(__name__)
 
 
-async def send_email_notification(report: DefectReport, group_name: str):
-    """Envoie un email à l'admin pour signaler un groupe de docks défectueux"""
-    html_content = f"""
-    <html>
-        <head>
-            <meta charset="UTF-8">
-        </head>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; background-color: #f5f5f5;">
-            <div style="background-color: #6c757d; color: white; padding: 15px; border-bottom: 3px solid #495057;">
-                <h2 style="margin: 0; font-size: 18px;">SIGNALEMENT DE GROUPE DE DOCKS DÉFECTUEUX</h2>
-            </div>
-            
-            <div style="background-color: white; padding: 20px; margin: 20px 0;">
-                <table style="width: 100%; border-collapse: collapse;">
+def _render_report_rows(group_name: str, group_id: int | None, reports: list[tuple[datetime, str | None]]) -> str:
+    rows = f"""
                     <tr>
                         <td style="padding: 10px 0; border-bottom: 1px solid #dee2e6;">
                             <strong>Groupe de docks</strong>
                         </td>
                         <td style="padding: 10px 0; border-bottom: 1px solid #dee2e6;">
-                            {group_name} (ID: {report.group_id})
+                            {escape(group_name)} (ID: {group_id})
                         </td>
-                    </tr>
+                    </tr>"""
+    for created_at, location in reports:
+        rows += f"""
                     <tr>
                         <td style="padding: 10px 0; border-bottom: 1px solid #dee2e6;">
-                            <strong>Information complémentaire</strong>
+                            <strong>Information complémentaire</strong><br>
+                            <span style="color: #6c757d; font-size: 12px;">{created_at.strftime("%Y-%m-%d %H:%M:%S")}</span>
                         </td>
                         <td style="padding: 10px 0; border-bottom: 1px solid #dee2e6;">
-                            {report.location or "Non précisée"}
+                            {escape(location) if location else "Non précisée"}
                         </td>
-                    </tr>
+                    </tr>"""
+    return rows
+
+
+def build_defect_digest(
+    group_name: str,
+    group_id: int | None,
+    reports: list[tuple[datetime, str | None]]
+) -> EmailMessage:
+    """
+    Construit un email regroupant tous les signalements d'un groupe de docks
+    reçus pendant la fenêtre de regroupement
+
+    Args:
+        group_name: Nom du groupe au moment du signalement
+        group_id: Identifiant du groupe
+        reports: Liste de (date du signalement, information complémentaire)
+    """
+    count = len(reports)
+    title = "SIGNALEMENT DE GROUPE DE DOCKS DÉFECTUEUX"
+    if count > 1:
+        title += f" ({count} SIGNALEMENTS)"
+
+    html_content = f"""
+    <html>
+        <head>
+            <meta charset="UTF-8">
+        </head>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; background-color: #f5f5f5;">
+            <div style="background-color: #6c757d; color: white; padding: 15px; border-bottom: 3px solid #495057;">
+                <h2 style="margin: 0; font-size: 18px;">{title}</h2>
+            </div>
+
+            <div style="background-color: white; padding: 20px; margin: 20px 0;">
+                <table style="width: 100%; border-collapse: collapse;">{_render_report_rows(group_name, group_id, reports)}
                 </table>
             </div>
-            
+
             <div style="background-color: #6c757d; color: #adb5bd; padding: 10px; text-align: center; font-size: 12px;">
                 <p style="margin: 0;">Wheelock Application - Notification automatique</p>
             </div>
         </body>
     </html>
     """
-    
-    message = MessageSchema(
-        subject=f"ALERTE - Groupe de docks défectueux - {group_name}",
-        recipients=[settings.ADMIN_EMAIL],
-        body=html_content,
-        subtype=MessageType.html,
-    )
-    
-    await fm.send_message(message)
+
+    subject = f"ALERTE - Groupe de docks défectueux - {group_name}"
+    if count > 1:
+        subject += f" ({count} signalements)"
+
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM}>"
+    message["To"] = settings.ADMIN_EMAIL
+    message.set_content(html_content, subtype="html")
+    return message
+
+
+class SMTPSender:
+    """
+    Connexion SMTP persistante, ouverte au premier envoi et réutilisée ensuite.
+    Rétablie automatiquement si le serveur l'a fermée entre deux envois.
+    """
+
+    def __init__(self):
+        self._smtp: "aiosmtplib.SMTP | None" = None
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        # Importé au premier envoi : inutile au démarrage d'un worker
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            username=settings.MAIL_USERNAME if settings.MAIL_USE_CREDENTIALS else None,
+            password=settings.MAIL_PASSWORD if settings.MAIL_USE_CREDENTIALS else None,
+            start_tls=settings.MAIL_STARTTLS,
+            timeout=settings.MAIL_TIMEOUT_SECONDS,
+        )
+        await smtp.connect()
+        return smtp
+
+    async def send(self, message: EmailMessage):
+        import aiosmtplib
+
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = await self._connect()
+
+        try:
+            await self._smtp.send_message(message)
+        except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+            # Connexion inactive fermée par le serveur : une seule nouvelle tentative
+            logger.info("Connexion SMTP fermée par le serveur, reconnexion")
+            self._smtp = await self._connect()
+            await self._smtp.send_message(message)
+
+    async def close(self):
+        if self._smtp is not None and self._smtp.is_connected:
+            import aiosmtplib
+
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
@@ -0,0 +1,61 @@
+"""
+Génération des déclinaisons (miniature, moyenne, pleine taille) des images de groupes
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Nom de la déclinaison -> plus grande dimension en pixels
+VARIANT_SIZES = {
+    "thumbnail": 256,
+    "medium": 1024,
+    "full": 2048,
+}
+WEBP_QUALITY = 80
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def generate_variants(path: str) -> dict[str, bytes]:
+    """
+    Redimensionne et recompresse une image en WebP pour chaque taille de VARIANT_SIZES.
+    Exécuté dans un processus séparé (décodage et encodage coûteux en CPU) : l'original
+    est lu depuis le disque plutôt que transmis en mémoire au processus.
+
+    Raises:
+        PIL.UnidentifiedImageError: Si le contenu n'est pas une image lisible
+    """
+    with Image.open(path) as source:
+        # Applique l'orientation EXIF des photos de téléphone avant redimensionnement
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        variants = {}
+        for name, max_size in VARIANT_SIZES.items():
+            variant = image.copy()
+            variant.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            output = BytesIO()
+            variant.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+            variants[name] = output.getvalue()
+
+    return variants
+
+
+async def build_variants(path: str) -> dict[str, bytes]:
+    """generate_variants exécuté dans le pool de processus, hors de la boucle d'événements"""
+    global _process_pool
+    if _process_pool is None:
+        from app.core.config import settings
+
+        # spawn : pas de fork d'un worker qui possède déjà des threads (pools S3, bcrypt)
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_process_pool, generate_variants, path)
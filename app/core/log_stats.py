@@ -0,0 +1,82 @@
+"""
+Compteurs incrémentaux de l'historique des statuts (dock_status_counters)
+"""
+from datetime import datetime
+
+from sqlalchemy import select, func, delete, exists, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.database import disable_statement_timeout
+
+# Verrou consultatif Postgres pour éviter que plusieurs workers initialisent les compteurs en parallèle
+_BACKFILL_LOCK_ID = 260026
+
+
+async def record_status_change(
+    db: AsyncSession,
+    dock_id: int,
+    status: models.DockStatus,
+    changed_at: datetime
+):
+    """
+    Incrémente les compteurs pour un changement de statut.
+    Doit être appelé dans la même transaction que l'insertion dans dock_status_history.
+    """
+    counter = models.DockStatusCounter.__table__
+    stmt = insert(counter).values(
+        dock_id=dock_id,
+        status=status,
+        change_count=1,
+        first_changed_at=changed_at,
+        last_changed_at=changed_at
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_dock_status_counters_dock_status",
+        set_={
+            "change_count": counter.c.change_count + 1,
+            "first_changed_at": func.least(counter.c.first_changed_at, stmt.excluded.first_changed_at),
+            "last_changed_at": func.greatest(counter.c.last_changed_at, stmt.excluded.last_changed_at),
+        }
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_counters(db: AsyncSession):
+    """
+    Recalcule entièrement les compteurs à partir de dock_status_history.
+    Utile pour corriger une dérive (ex: historique modifié manuellement).
+    """
+    history = models.DockStatusHistory
+    # Parcours complet de l'historique : peut dépasser le statement_timeout des pools
+    await disable_statement_timeout(db)
+    # Bloque les incréments concurrents le temps du recalcul
+    await db.execute(text("LOCK TABLE dock_status_counters IN EXCLUSIVE MODE"))
+    await db.execute(delete(models.DockStatusCounter))
+    await db.execute(
+        insert(models.DockStatusCounter).from_select(
+            ["dock_id", "status", "change_count", "first_changed_at", "last_changed_at"],
+            select(
+                history.dock_id,
+                history.status,
+                func.count(history.id),
+                func.min(history.changed_at),
+                func.max(history.changed_at)
+            ).group_by(history.dock_id, history.status)
+        )
+    )
+
+
+async def backfill_counters_if_empty(db: AsyncSession):
+    """
+    Initialise les compteurs si la table est vide alors que l'historique ne l'est pas
+    (premier démarrage sur une base existante)
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(_BACKFILL_LOCK_ID)))
+    has_counters = (await db.execute(select(exists().select_from(models.DockStatusCounter)))).scalar()
+    has_history = (await db.execute(select(exists().select_from(models.DockStatusHistory)))).scalar()
+
+    if not has_counters and has_history:
+        await rebuild_counters(db)
+    await db.commit()
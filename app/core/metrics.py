@@ -0,0 +1,287 @@
+"""
+Métriques en mémoire au format d'exposition Prometheus (texte), sans dépendance externe
+
+Les valeurs sont de simples compteurs Python mis à jour depuis la boucle d'événements :
+une mise à jour coûte un accès dictionnaire et une addition. Les jauges dont la valeur
+est déjà connue ailleurs (pool de connexions) sont lues au moment de l'export.
+"""
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: list["_Metric"] | None = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        # Registre global par défaut ; un registre dédié garde les métriques hors de /metrics (tests)
+        (REGISTRY if registry is None else registry).append(self)
+
+    def labels(self, *values: str):
+        """Série correspondant aux valeurs d'étiquettes, créée au premier usage"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: étiquettes attendues {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Nouvelle série, pour une combinaison d'étiquettes"""
+
+    @abstractmethod
+    def _samples(self):
+        """(suffixe, valeurs d'étiquettes, étiquette supplémentaire, valeur) de chaque échantillon"""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        """Raccourci pour un compteur sans étiquette"""
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield "_total", values, "", child.value
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: list[_Metric] | None = None
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self._callbacks: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def set_function(self, callback: Callable[[], float], *values: str):
+        """Valeur calculée au moment de l'export"""
+        self._callbacks[values] = callback
+
+    def _samples(self):
+        for values, child in self._children.items():
+            yield "", values, "", child.value
+        for values, callback in self._callbacks.items():
+            yield "", values, "", callback()
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: list[_Metric] | None = None
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _samples(self):
+        for values, child in self._children.items():
+            # Les compteurs par intervalle sont cumulés à l'export, pas à chaque observation
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                yield "_bucket", values, f'le="{_format_value(bound)}"', cumulative
+            yield "_bucket", values, 'le="+Inf"', child.count
+            yield "_sum", values, "", child.sum
+            yield "_count", values, "", child.count
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render(registry: list[_Metric] | None = None) -> str:
+    """Export de toutes les métriques d'un registre (global par défaut) au format texte Prometheus"""
+    lines = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Métriques de l'application
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Durée de traitement des requêtes HTTP",
+    ("method", "route", "status"),
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out_connections",
+    "Connexions du pool actuellement utilisées",
+    ("pool",),
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow_connections",
+    "Connexions ouvertes au-delà de pool_size (négatif : connexions pas encore ouvertes)",
+    ("pool",),
+)
+sensor_updates = Counter(
+    "sensor_updates",
+    "Mises à jour reçues des capteurs",
+    ("result",),
+)
+websocket_connections = Gauge(
+    "websocket_connections",
+    "Clients WebSocket connectés",
+)
+websocket_broadcast_duration = Histogram(
+    "websocket_broadcast_duration_seconds",
+    "Durée de diffusion d'un message à tous les clients WebSocket",
+)
+websocket_send_failures = Counter(
+    "websocket_send_failures",
+    "Envois WebSocket en échec (client déconnecté)",
+)
+change_feed_subscribers = Gauge(
+    "change_feed_subscribers",
+    "Clients SSE et long-poll en attente de changements",
+)
+storage_operation_duration = Histogram(
+    "storage_operation_duration_seconds",
+    "Durée des appels au stockage S3",
+    ("operation",),
+)
+email_send_duration = Histogram(
+    "email_send_duration_seconds",
+    "Durée d'envoi d'un email de notification",
+)
+email_send_failures = Counter(
+    "email_send_failures",
+    "Envois d'email en échec",
+)
+
+
+def register_pool(name: str, engine):
+    """Expose l'occupation du pool de connexions d'un moteur SQLAlchemy"""
+    db_pool_checked_out.set_function(engine.pool.checkedout, name)
+    db_pool_overflow.set_function(engine.pool.overflow, name)
+
+
+class MetricsMiddleware:
+    """
+    Mesure la durée des requêtes HTTP par modèle de route (/api/admin/docks/{dock_id})
+    plutôt que par chemin, pour borner le nombre de séries
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Route résolue par le routeur, qui complète le scope en place
+            route = scope.get("route")
+            http_request_duration.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status_code)
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,104 @@
+"""
+Profileur par échantillonnage des piles d'appels du worker en cours
+
+Un thread relève à intervalle régulier la pile de la boucle d'événements (ou de tous
+les threads) via sys._current_frames() et compte les piles identiques. Le résultat est
+au format « collapsed stacks » de flamegraph.pl / speedscope :
+
+    app/main.py:startup;app/api/public.py:list_parking_groups 42
+
+Aucun coût lorsque le profileur est arrêté : rien n'est installé dans l'interpréteur.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+# Fonctions de la boucle d'événements en attente d'E/S (échantillons « inactifs »).
+# Avec uvloop, la boucle est en C : la feuille Python est alors asyncio.Runner.run
+_IDLE_FUNCTIONS = {("selectors.py", "select"), ("selectors.py", "poll"), ("runners.py", "run")}
+
+# Racine du projet : chemins relatifs pour l'application, nom de fichier seul pour les bibliothèques
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+
+# Libellé de chaque objet code, calculé une seule fois
+_labels: dict = {}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(_PROJECT_ROOT):
+            filename = filename[len(_PROJECT_ROOT):]
+        else:
+            filename = os.path.basename(filename)
+        label = _labels[code] = f"{filename}:{code.co_qualname}"
+    return label
+
+
+def _collapse(frame) -> tuple[str, bool]:
+    """Pile racine -> feuille séparée par des ';', et si elle correspond à une attente d'E/S"""
+    leaf = frame.f_code
+    idle = (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_FUNCTIONS
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels), idle
+
+
+class SamplingProfiler:
+    """
+    Échantillonne les piles d'un thread (celui de la boucle d'événements par défaut)
+    ou de tous les threads du processus
+    """
+
+    def __init__(self, interval: float = 0.01, thread_id: int | None = None, include_idle: bool = False):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.all_threads = False
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def for_all_threads(cls, interval: float = 0.01, include_idle: bool = False) -> "SamplingProfiler":
+        profiler = cls(interval=interval, include_idle=include_idle)
+        profiler.all_threads = True
+        return profiler
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()} if self.all_threads else {}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id or (not self.all_threads and thread_id != self.thread_id):
+                continue
+            stack, idle = _collapse(frame)
+            if idle and not self.include_idle:
+                continue
+            if self.all_threads:
+                stack = f"{names.get(thread_id, thread_id)};{stack}"
+            self._stacks[stack] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """Piles au format collapsed, les plus fréquentes en premier"""
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
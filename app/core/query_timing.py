@@ -0,0 +1,138 @@
+"""
+Temps passé en base par requête HTTP et journal des requêtes SQL lentes
+
+Les événements du moteur SQLAlchemy mesurent chaque requête SQL et l'attribuent à la
+requête HTTP en cours (contextvar). Le middleware ajoute un en-tête Server-Timing
+séparant le temps base de données du temps applicatif, par exemple :
+
+    Server-Timing: db;dur=12.4, app;dur=3.1, db-queries;desc="3"
+"""
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Paramètres masqués dans le journal des requêtes lentes (empreintes de mots de passe, clés...)
+SENSITIVE_PARAMETER_MARKERS = ("password", "hash", "secret", "token", "key")
+MAX_LOGGED_VALUE_LENGTH = 64
+MAX_LOGGED_PARAMETERS_LENGTH = 500
+
+
+class RequestQueryStats:
+    """Cumul des requêtes SQL émises pendant une requête HTTP"""
+
+    __slots__ = ("scope", "query_count", "db_seconds")
+
+    def __init__(self, scope: Scope | None = None):
+        self.scope = scope
+        self.query_count = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "-"
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {route.path if route is not None else self.scope['path']}"
+
+
+_current_stats: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def current_stats() -> RequestQueryStats | None:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _redact(name: str | None, value) -> str:
+    # Nom inconnu (SQL brut) : seul le type est journalisé
+    if name is None:
+        return type(value).__name__
+    if any(marker in name.lower() for marker in SENSITIVE_PARAMETER_MARKERS):
+        return "***"
+    text = repr(value)
+    return text if len(text) <= MAX_LOGGED_VALUE_LENGTH else text[:MAX_LOGGED_VALUE_LENGTH] + "…"
+
+
+def redacted_parameters(context, parameters, executemany: bool) -> str:
+    """Paramètres d'une requête pour le journal : valeurs tronquées, colonnes sensibles masquées"""
+    if executemany:
+        return f"{len(parameters)} jeu(x) de paramètres"
+    if context.compiled is not None and context.compiled_parameters:
+        # Paramètres nommés, y compris ceux des clauses IN développées
+        items = context.compiled_parameters[0].items()
+    elif isinstance(parameters, dict):
+        items = ((None, value) for value in parameters.values())
+    else:
+        items = ((None, value) for value in parameters or ())
+    text = ", ".join(f"{name or '?'}={_redact(name, value)}" for name, value in items)
+    return text if len(text) <= MAX_LOGGED_PARAMETERS_LENGTH else text[:MAX_LOGGED_PARAMETERS_LENGTH] + "…"
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._query_started
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.db_seconds += duration
+
+    if settings.SLOW_QUERY_THRESHOLD_MS and duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            f"Requête SQL lente ({duration * 1000:.0f} ms, {max(cursor.rowcount, 0)} ligne(s)) "
+            f"[{stats.route if stats is not None else 'tâche de fond'}]: "
+            f"{' '.join(statement.split())} -- {redacted_parameters(context, parameters, executemany)}"
+        )
+
+
+def instrument_engine(engine):
+    """Branche la mesure des requêtes sur un moteur (AsyncEngine ou Engine)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryTimingMiddleware:
+    """
+    Initialise le cumul des requêtes SQL de chaque requête HTTP et l'expose dans
+    l'en-tête Server-Timing de la réponse
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                total_ms = (time.perf_counter() - started) * 1000
+                db_ms = stats.db_seconds * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={db_ms:.1f}, app;dur={max(total_ms - db_ms, 0):.1f}, '
+                    f'db-queries;desc="{stats.query_count}"'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
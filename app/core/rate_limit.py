@@ -0,0 +1,91 @@
+"""
+Limitation de débit en mémoire (token bucket), sans accès à la base de données
+"""
+import math
+import time
+from typing import Callable
+
+from fastapi import HTTPException, Request
+
+
+class TokenBucketLimiter:
+    """
+    Un seau de jetons par clé (sensor_id, clé d'API, IP...).
+
+    Chaque seau est stocké sous la forme [jetons, dernier_remplissage] et n'est
+    rempli qu'au moment où la clé est consultée. Les seaux redevenus pleins sont
+    supprimés périodiquement : les recréer pleins plus tard est équivalent, ce qui
+    borne la mémoire au nombre de clés actives.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        sweep_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.burst = float(burst)
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._buckets: dict[str, list[float]] = {}
+        self._last_sweep = clock()
+
+    def consume(self, key: str) -> float:
+        """
+        Consomme un jeton pour `key`.
+
+        Returns:
+            0 si la requête est autorisée, sinon le délai (en secondes) avant le prochain jeton
+        """
+        now = self._clock()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [self.burst - 1.0, now]
+            return 0.0
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+
+        bucket[0] = tokens
+        return (1.0 - tokens) / self.rate
+
+    def check(self, key: str):
+        """Lève une erreur 429 si `key` a épuisé ses jetons"""
+        retry_after = self.consume(key)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Trop de requêtes, réessayez plus tard",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    def _sweep(self, now: float):
+        refill_time = self.burst / self.rate
+        idle = [key for key, (_, last) in self._buckets.items() if now - last >= refill_time]
+        for key in idle:
+            del self._buckets[key]
+        self._last_sweep = now
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def client_ip(request: Request, trusted_proxy_hops: int = 0) -> str:
+    """
+    IP du client. Derrière `trusted_proxy_hops` reverse proxies de confiance, chacun
+    ajoute à X-Forwarded-For l'adresse qui l'a contacté : seules les dernières entrées
+    sont fiables, les premières sont fournies par le client et ne servent jamais de clé.
+    """
+    if trusted_proxy_hops > 0:
+        forwarded_for = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",")]
+        if len(forwarded_for) >= trusted_proxy_hops and forwarded_for[-trusted_proxy_hops]:
+            return forwarded_for[-trusted_proxy_hops]
+    return request.client.host if request.client else "unknown"
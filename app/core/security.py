@@ -2,27 +2,59 @@ from fastapi import Depends, HTTPException, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from jose import JWTError
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hmac
 import logging
-from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.jwt import decode_token
 from app.core.config import settings
-from app.database import get_db
+from app.core.cache import TTLCache
+from app.core.sensor_keys import authenticate_sensor_key
+from app.database import AsyncSessionLocal
 from app import models
 
 pwd_context = CryptContext(schemes=["bcrypt"])
 security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
+# admin_id -> is_active, évite une requête par appel authentifié. Cache local au worker :
+# un compte désactivé ou supprimé reste accepté jusqu'à ADMIN_CACHE_TTL_SECONDS
+_admin_cache = TTLCache(
+    maxsize=settings.ADMIN_CACHE_MAX_SIZE,
+    ttl=settings.ADMIN_CACHE_TTL_SECONDS
+)
+
+# bcrypt relâche le GIL : un pool de threads borné suffit à libérer la boucle d'événements
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+@dataclass(frozen=True)
+class AdminPrincipal:
+    """Administrateur authentifié (JWT vérifié et compte actif)"""
+    id: int
+
 def verify_password(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
 
 def get_password_hash(password: str):
     return pwd_context.hash(password)
 
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """verify_password exécuté hors de la boucle d'événements (~200 ms de CPU par appel)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash exécuté hors de la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
 async def require_admin(
-    creds: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-):
+    creds: HTTPAuthorizationCredentials = Depends(security)
+) -> AdminPrincipal:
     try:
         payload = decode_token(creds.credentials)
 
@@ -30,16 +62,38 @@ async def require_admin(
             raise HTTPException(status_code=403)
         
         admin_id = int(payload["sub"])
-        admin = await db.get(models.Admin, admin_id)
+        is_active = _admin_cache.get(admin_id)
 
-        if not admin or not admin.is_active:
+        if is_active is None:
+            # Session ouverte uniquement en cas d'absence dans le cache
+            async with AsyncSessionLocal() as db:
+                admin = await db.get(models.Admin, admin_id)
+            is_active = bool(admin and admin.is_active)
+            _admin_cache.set(admin_id, is_active)
+
+        if not is_active:
             raise HTTPException(status_code=401)
 
-        return admin
+        return AdminPrincipal(id=admin_id)
     except JWTError:
         raise HTTPException(status_code=401)
 
-def require_sensor_key(x_api_key: str = Header(...)):
-    if x_api_key != settings.SENSOR_API_KEY:
+async def require_sensor_key(x_api_key: str = Header(...)) -> str | None:
+    """
+    Authentifie un capteur.
+
+    Returns:
+        Le sensor_id associé à une clé individuelle, ou None pour la clé partagée
+        historique (SENSOR_API_KEY), qui n'est rattachée à aucun capteur
+    """
+    if settings.SENSOR_SHARED_KEY_ENABLED and hmac.compare_digest(
+        x_api_key.encode(), settings.SENSOR_API_KEY.encode()
+    ):
+        return None
+
+    sensor_id = await authenticate_sensor_key(x_api_key)
+    if sensor_id is None:
         logger.warning(f"Tentative d'accès sensor avec clé invalide")
         raise HTTPException(status_code=403)
+
+    return sensor_id
@@ -0,0 +1,77 @@
+"""
+Clés d'API individuelles des capteurs (ESP32)
+
+Seule l'empreinte SHA-256 de la clé est stockée. Les clés étant générées
+aléatoirement (256 bits), un hachage lent type bcrypt est inutile et le
+chemin /api/sensor/update reste rapide. La recherche se fait directement sur
+l'empreinte : un écart de temps ne renseigne que sur l'empreinte d'une clé
+choisie par l'attaquant, pas sur une clé valide.
+"""
+import hashlib
+import logging
+import secrets
+
+from sqlalchemy import select
+
+from app import models
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# empreinte -> sensor_id
+_valid_keys = TTLCache(
+    maxsize=settings.SENSOR_KEY_CACHE_MAX_SIZE,
+    ttl=settings.SENSOR_KEY_CACHE_TTL_SECONDS
+)
+# empreintes inconnues ou révoquées, pour ne pas interroger la base à chaque tentative
+_invalid_keys = TTLCache(
+    maxsize=settings.SENSOR_KEY_CACHE_MAX_SIZE,
+    ttl=settings.SENSOR_KEY_NEGATIVE_CACHE_TTL_SECONDS
+)
+
+
+def generate_sensor_key() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+async def authenticate_sensor_key(api_key: str) -> str | None:
+    """
+    Retourne le sensor_id associé à la clé, ou None si elle est inconnue ou révoquée.
+    Sans requête en base tant que la clé est dans le cache.
+    """
+    key_hash = fingerprint(api_key)
+
+    sensor_id = _valid_keys.get(key_hash)
+    if sensor_id is not None:
+        return sensor_id
+
+    if _invalid_keys.get(key_hash):
+        return None
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.SensorCredential.sensor_id).where(
+                models.SensorCredential.key_hash == key_hash,
+                models.SensorCredential.is_active.is_(True)
+            )
+        )
+        sensor_id = result.scalar()
+
+    if sensor_id is not None:
+        _valid_keys.set(key_hash, sensor_id)
+        return sensor_id
+
+    _invalid_keys.set(key_hash, True)
+    return None
+
+
+def invalidate_sensor_keys():
+    """Vide les caches (après révocation ou rotation dans ce worker)"""
+    _valid_keys.clear()
+    _invalid_keys.clear()
@@ -1,44 +1,122 @@
 """
 Service de stockage d'images avec MinIO (compatible S3)
 """
+import asyncio
 import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, cached_property
 from typing import Optional
 from datetime import datetime
 from io import BytesIO
 import uuid
 
-import boto3
 from botocore.exceptions import ClientError, BotoCoreError
 from fastapi import UploadFile, HTTPException
+from PIL import Image, UnidentifiedImageError
 
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core import metrics
+from app.core.images import VARIANT_SIZES, build_variants
 
 logger = logging.getLogger(__name__)
 
+# Taille des blocs copiés vers le fichier temporaire lu par la génération des déclinaisons
+VARIANT_SOURCE_CHUNK_BYTES = 1024 * 1024
+
 
 class StorageService:
     """
     Service pour gérer le stockage de fichiers dans MinIO/S3
+
+    boto3 étant synchrone, les appels réseau sont exécutés dans un pool de threads
+    dédié (dimensionné comme le pool de connexions HTTP du client) afin de ne pas
+    bloquer la boucle d'événements.
     """
     
     def __init__(self):
         """
-        Initialise le client S3 avec les configurations MinIO
+        Prépare le pool de threads et les caches ; les clients S3 sont créés au premier usage
         """
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_MAX_CONNECTIONS,
+            thread_name_prefix="storage"
+        )
+        # Existence du bucket vérifiée une fois puis mémorisée
+        self._bucket_available = False
+        # (object_key, expiration) -> URL pré-signée, réutilisée jusqu'à peu avant son expiration
+        self._presigned_urls = TTLCache(
+            maxsize=settings.PRESIGNED_URL_CACHE_SIZE,
+            ttl=settings.PRESIGNED_URL_EXPIRATION_SECONDS
+        )
+        self.bucket_name = settings.MINIO_BUCKET_NAME
+        # La session boto3 par défaut n'est pas thread-safe (premier appel depuis le pool)
+        self._client_lock = threading.Lock()
+
+    # Clients créés au premier appel : l'import de boto3 et la construction d'un client
+    # coûtent plus de 100 ms, inutiles au démarrage d'un worker
+    @cached_property
+    def s3_client(self):
+        import boto3
+        from botocore.config import Config
+
         try:
-            self.s3_client = boto3.client(
+            with self._client_lock:
+                client = boto3.client(
+                    's3',
+                    endpoint_url=settings.MINIO_ENDPOINT,
+                    aws_access_key_id=settings.MINIO_ACCESS_KEY,
+                    aws_secret_access_key=settings.MINIO_SECRET_KEY,
+                    use_ssl=settings.MINIO_USE_SSL,
+                    verify=False,  # Pour le développement local
+                    config=Config(max_pool_connections=settings.STORAGE_MAX_CONNECTIONS)
+                )
+        except Exception as e:
+            logger.error(f"Erreur lors de l'initialisation du client S3: {str(e)}")
+            raise
+        logger.info(f"Client S3 initialisé avec succès pour le bucket: {self.bucket_name}")
+        return client
+
+    @cached_property
+    def _signing_client(self):
+        """
+        Client de signature uniquement (aucun appel réseau) : les URLs pré-signées
+        doivent porter l'hôte public, qui fait partie de la signature
+        """
+        import boto3
+        from botocore.config import Config
+
+        with self._client_lock:
+            return boto3.client(
                 's3',
-                endpoint_url=settings.MINIO_ENDPOINT,
+                endpoint_url=settings.MINIO_PUBLIC_ENDPOINT,
                 aws_access_key_id=settings.MINIO_ACCESS_KEY,
                 aws_secret_access_key=settings.MINIO_SECRET_KEY,
-                use_ssl=settings.MINIO_USE_SSL,
-                verify=False  # Pour le développement local
+                config=Config(signature_version='s3v4', s3={'addressing_style': 'path'})
+            )
+
+    async def _run(self, func, *args, **kwargs):
+        """Exécute un appel boto3 bloquant dans le pool dédié"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+        finally:
+            metrics.storage_operation_duration.labels(getattr(func, "__name__", "call").lstrip("_")).observe(
+                time.perf_counter() - started
             )
-            self.bucket_name = settings.MINIO_BUCKET_NAME
-            logger.info(f"Client S3 initialisé avec succès pour le bucket: {self.bucket_name}")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'initialisation du client S3: {str(e)}")
-            raise
+
+    async def ensure_bucket(self) -> bool:
+        """
+        Vérifie l'existence du bucket (au démarrage), puis réutilise le résultat.
+        Un échec n'est pas mémorisé : la vérification sera retentée au prochain appel.
+        """
+        if not self._bucket_available:
+            self._bucket_available = await self._run(self._verify_bucket_exists)
+        return self._bucket_available
 
     def _verify_bucket_exists(self) -> bool:
         """
@@ -80,7 +158,8 @@ class StorageService:
     async def upload_image(
         self, 
         file: UploadFile, 
-        folder: str = "images"
+        folder: str = "images",
+        close_file: bool = True
     ) -> str:
         """
         Upload un fichier image vers MinIO et retourne l'URL publique
@@ -88,6 +167,7 @@ class StorageService:
         Args:
             file: Le fichier à uploader (FastAPI UploadFile)
             folder: Le dossier dans le bucket (optionnel)
+            close_file: Fermer le fichier après l'upload (False pour le relire ensuite)
             
         Returns:
             L'URL publique du fichier uploadé
@@ -95,8 +175,8 @@ class StorageService:
         Raises:
             HTTPException: Si l'upload échoue
         """
-        # Vérification que le bucket existe
-        if not self._verify_bucket_exists():
+        # Vérification que le bucket existe (mémorisée après le premier succès)
+        if not await self.ensure_bucket():
             raise HTTPException(
                 status_code=500,
                 detail=f"Le bucket de stockage {self.bucket_name} n'est pas accessible"
@@ -117,25 +197,38 @@ class StorageService:
                 detail=f"Type de fichier non autorisé. Types acceptés: {', '.join(allowed_content_types)}"
             )
 
+        # Rejet immédiat si la taille annoncée dépasse la limite (revérifiée pendant le transfert)
+        if file.size is not None and file.size > settings.STORAGE_MAX_UPLOAD_BYTES:
+            raise self._too_large_error()
+
         # Génération du nom de fichier unique
         unique_filename = self._generate_unique_filename(file.filename)
         object_key = f"{folder}/{unique_filename}"
+        metadata = {
+            'original-filename': file.filename,
+            'upload-date': datetime.now().isoformat()
+        }
 
         try:
-            # Lecture du contenu du fichier
-            file_content = await file.read()
+            # Lecture par blocs : la mémoire consommée est bornée par la taille d'un bloc
+            chunk_size = settings.STORAGE_UPLOAD_CHUNK_BYTES
+            # Un octet de plus que la limite suffit à détecter un dépassement (taille inconnue)
+            first_chunk = await file.read(min(chunk_size, settings.STORAGE_MAX_UPLOAD_BYTES + 1))
+            if len(first_chunk) > settings.STORAGE_MAX_UPLOAD_BYTES:
+                raise self._too_large_error()
             
-            # Upload vers MinIO
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=object_key,
-                Body=BytesIO(file_content),
-                ContentType=file.content_type,
-                Metadata={
-                    'original-filename': file.filename,
-                    'upload-date': datetime.now().isoformat()
-                }
-            )
+            if len(first_chunk) < chunk_size:
+                # Fichier tenant dans un seul bloc : upload simple
+                await self._run(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name,
+                    Key=object_key,
+                    Body=BytesIO(first_chunk),
+                    ContentType=file.content_type,
+                    Metadata=metadata
+                )
+            else:
+                await self._multipart_upload(file, object_key, first_chunk, file.content_type, metadata)
             
             # Construction de l'URL publique
             public_url = f"{settings.MINIO_PUBLIC_ENDPOINT}/{self.bucket_name}/{object_key}"
@@ -143,6 +236,8 @@ class StorageService:
             logger.info(f"Fichier uploadé avec succès: {object_key}")
             return public_url
 
+        except HTTPException:
+            raise
         except ClientError as e:
             error_code = e.response['Error']['Code']
             logger.error(f"Erreur S3 lors de l'upload: {error_code} - {str(e)}")
@@ -164,9 +259,164 @@ class StorageService:
             )
         finally:
             # Fermeture du fichier
-            await file.close()
+            if close_file:
+                await file.close()
 
-    def delete_image(self, image_url: str) -> bool:
+    async def upload_image_variants(self, file: UploadFile, image_url: str) -> dict[str, str]:
+        """
+        Génère les déclinaisons WebP d'une image déjà uploadée et les stocke à côté de l'original
+        (ex: docks-groups/20260119_abc123_thumbnail.webp)
+        
+        Args:
+            file: Le fichier original, relu depuis le début
+            image_url: L'URL publique de l'original retournée par upload_image
+            
+        Returns:
+            Nom de la déclinaison -> URL publique
+            
+        Raises:
+            HTTPException: Si l'image est illisible ou si l'upload échoue
+        """
+        object_key = self.object_key_from_url(image_url)
+        if object_key is None:
+            raise HTTPException(status_code=500, detail="URL de l'image originale invalide")
+        base_key = object_key.rsplit('.', 1)[0]
+
+        # Copie par blocs dans un fichier temporaire relu par le processus de génération :
+        # ni l'original entier en mémoire, ni sa transmission par pickle
+        await file.seek(0)
+        with tempfile.NamedTemporaryFile(prefix="wheelock-upload-") as source:
+            while chunk := await file.read(VARIANT_SOURCE_CHUNK_BYTES):
+                await asyncio.to_thread(source.write, chunk)
+            await asyncio.to_thread(source.flush)
+            try:
+                variants = await build_variants(source.name)
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+                logger.warning(f"Image illisible, déclinaisons non générées: {str(e)}")
+                raise HTTPException(status_code=400, detail="Le fichier n'est pas une image lisible")
+
+        names = list(variants)
+        # Tous les envois terminés avant de signaler une erreur : l'appelant planifie alors
+        # la suppression de variant_urls() sans course avec un envoi encore en cours
+        results = await asyncio.gather(*(
+            self.upload_bytes(variants[name], f"{base_key}_{name}.webp", "image/webp")
+            for name in names
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(names, results))
+
+    def variant_urls(self, image_url: str) -> list[str]:
+        """URLs de toutes les déclinaisons possibles d'une image (uploadées ou non)"""
+        object_key = self.object_key_from_url(image_url)
+        if object_key is None:
+            return []
+        base_key = object_key.rsplit('.', 1)[0]
+        return [
+            f"{settings.MINIO_PUBLIC_ENDPOINT}/{self.bucket_name}/{base_key}_{name}.webp"
+            for name in VARIANT_SIZES
+        ]
+
+    async def upload_bytes(self, data: bytes, object_key: str, content_type: str) -> str:
+        """
+        Upload un contenu déjà en mémoire et retourne son URL publique
+        
+        Raises:
+            HTTPException: Si l'upload échoue
+        """
+        try:
+            await self._run(
+                self.s3_client.put_object,
+                Bucket=self.bucket_name,
+                Key=object_key,
+                Body=BytesIO(data),
+                ContentType=content_type
+            )
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Erreur lors de l'upload de {object_key}: {str(e)}")
+            raise HTTPException(status_code=500, detail="Erreur lors de l'upload du fichier")
+
+        return f"{settings.MINIO_PUBLIC_ENDPOINT}/{self.bucket_name}/{object_key}"
+
+    def object_key_from_url(self, image_url: str) -> Optional[str]:
+        """
+        Extrait l'object_key depuis une URL publique
+        Format: http://localhost:9000/images-public/images/20260119_abc123.jpg
+        """
+        parts = image_url.split(f"/{self.bucket_name}/")
+        if len(parts) != 2:
+            return None
+        return parts[1]
+
+    async def _multipart_upload(
+        self,
+        file: UploadFile,
+        object_key: str,
+        first_chunk: bytes,
+        content_type: str,
+        metadata: dict
+    ):
+        """
+        Transfère le fichier bloc par bloc dans un upload multipart S3.
+        L'upload est annulé (parts supprimées côté S3) en cas d'erreur ou de dépassement de taille.
+        """
+        upload = await self._run(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=object_key,
+            ContentType=content_type,
+            Metadata=metadata
+        )
+        upload_id = upload['UploadId']
+
+        try:
+            parts = []
+            total_size = 0
+            chunk = first_chunk
+            while chunk:
+                total_size += len(chunk)
+                if total_size > settings.STORAGE_MAX_UPLOAD_BYTES:
+                    raise self._too_large_error()
+
+                part_number = len(parts) + 1
+                part = await self._run(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket_name,
+                    Key=object_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=chunk
+                )
+                parts.append({'ETag': part['ETag'], 'PartNumber': part_number})
+                chunk = await file.read(settings.STORAGE_UPLOAD_CHUNK_BYTES)
+
+            await self._run(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            try:
+                await self._run(
+                    self.s3_client.abort_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=object_key,
+                    UploadId=upload_id
+                )
+            except Exception as e:
+                logger.error(f"Erreur lors de l'annulation de l'upload multipart {object_key}: {str(e)}")
+            raise
+
+    def _too_large_error(self) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Fichier trop volumineux (maximum: {settings.STORAGE_MAX_UPLOAD_BYTES // (1024 * 1024)} Mo)"
+        )
+
+    async def delete_image(self, image_url: str) -> bool:
         """
         Supprime une image du stockage MinIO
         
@@ -178,16 +428,14 @@ class StorageService:
         """
         try:
             # Extraction de l'object_key depuis l'URL
-            # Format: http://localhost:9000/images-public/images/20260119_abc123.jpg
-            parts = image_url.split(f"/{self.bucket_name}/")
-            if len(parts) != 2:
+            object_key = self.object_key_from_url(image_url)
+            if object_key is None:
                 logger.error(f"Format d'URL invalide: {image_url}")
                 return False
             
-            object_key = parts[1]
-            
             # Suppression de l'objet
-            self.s3_client.delete_object(
+            await self._run(
+                self.s3_client.delete_object,
                 Bucket=self.bucket_name,
                 Key=object_key
             )
@@ -202,11 +450,58 @@ class StorageService:
             logger.error(f"Erreur inattendue lors de la suppression: {str(e)}")
             return False
 
+    async def delete_objects(self, object_keys: list[str]) -> dict[str, str]:
+        """
+        Supprime jusqu'à 1000 objets en un seul appel S3 (DeleteObjects)
+        
+        Args:
+            object_keys: Les clés à supprimer (1000 maximum)
+            
+        Returns:
+            Les clés en échec -> message d'erreur (vide si tout a été supprimé)
+            
+        Raises:
+            ClientError, BotoCoreError: Si l'appel lui-même échoue
+        """
+        response = await self._run(
+            self.s3_client.delete_objects,
+            Bucket=self.bucket_name,
+            Delete={
+                'Objects': [{'Key': key} for key in object_keys],
+                'Quiet': True
+            }
+        )
+        return {
+            error['Key']: f"{error.get('Code')}: {error.get('Message')}"
+            for error in response.get('Errors', [])
+        }
+
+    async def list_objects(self, prefix: str) -> list[tuple[str, datetime]]:
+        """
+        Liste les objets sous un préfixe
+        
+        Returns:
+            Liste de (clé, date de dernière modification)
+        """
+        def _list():
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            return [
+                (obj['Key'], obj['LastModified'])
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+                for obj in page.get('Contents', [])
+            ]
+
+        return await self._run(_list)
+
     def get_presigned_url(self, object_key: str, expiration: int = 3600) -> Optional[str]:
         """
         Génère une URL pré-signée pour un accès temporaire sécurisé
         (Utile pour les buckets privés)
         
+        La même URL est renvoyée tant qu'il lui reste plus de
+        PRESIGNED_URL_SAFETY_MARGIN_SECONDS de validité : pas de calcul de signature
+        à chaque requête, et une URL stable que navigateurs et CDN peuvent mettre en cache.
+        
         Args:
             object_key: La clé de l'objet dans le bucket
             expiration: Durée de validité de l'URL en secondes (défaut: 1h)
@@ -214,8 +509,13 @@ class StorageService:
         Returns:
             L'URL pré-signée ou None en cas d'erreur
         """
+        cache_key = (object_key, expiration)
+        url = self._presigned_urls.get(cache_key)
+        if url is not None:
+            return url
+
         try:
-            url = self.s3_client.generate_presigned_url(
+            url = self._signing_client.generate_presigned_url(
                 'get_object',
                 Params={
                     'Bucket': self.bucket_name,
@@ -223,11 +523,35 @@ class StorageService:
                 },
                 ExpiresIn=expiration
             )
-            return url
         except ClientError as e:
             logger.error(f"Erreur lors de la génération de l'URL pré-signée: {str(e)}")
             return None
 
+        reuse_for = expiration - settings.PRESIGNED_URL_SAFETY_MARGIN_SECONDS
+        if reuse_for > 0:
+            self._presigned_urls.set(cache_key, url, ttl=reuse_for)
+        return url
+
+    def resolve_image_url(self, image_url: Optional[str]) -> Optional[str]:
+        """
+        URL à renvoyer aux clients pour une image stockée : l'URL publique telle quelle,
+        ou une URL pré-signée (mise en cache) si le bucket est privé
+        """
+        if not image_url or not settings.MINIO_PRIVATE_BUCKET:
+            return image_url
+
+        object_key = self.object_key_from_url(image_url)
+        if object_key is None:
+            # URL externe renseignée manuellement
+            return image_url
+        return self.get_presigned_url(object_key, settings.PRESIGNED_URL_EXPIRATION_SECONDS)
+
+    def resolve_image_variants(self, image_variants: Optional[dict[str, str]]) -> Optional[dict[str, str]]:
+        """resolve_image_url appliqué à chaque déclinaison"""
+        if not image_variants or not settings.MINIO_PRIVATE_BUCKET:
+            return image_variants
+        return {name: self.resolve_image_url(url) for name, url in image_variants.items()}
+
 
 # Instance unique du service de stockage
 storage_service = StorageService()
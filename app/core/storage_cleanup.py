@@ -0,0 +1,195 @@
+"""
+Suppression différée des objets du stockage et nettoyage des objets orphelins
+
+Les routes admin n'appellent plus le stockage pour supprimer une image : elles
+enregistrent les clés dans storage_deletions dans la même transaction que la
+modification du groupe. Un worker de fond vide la file par lots (DeleteObjects)
+avec reprise exponentielle, et un balayage périodique met en file les objets
+qu'aucun groupe ne référence plus.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, UTC
+
+from botocore.exceptions import ClientError, BotoCoreError
+from sqlalchemy import select, delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.config import settings
+from app.core.storage import storage_service
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Dossier des images de groupes dans le bucket (seul préfixe balayé)
+GROUP_IMAGES_PREFIX = "docks-groups/"
+
+# Verrou consultatif Postgres : un seul worker effectue le balayage
+_RECONCILE_LOCK_ID = 260035
+
+
+def group_image_urls(group: models.DocksGroup) -> list[str]:
+    """URLs de l'image originale d'un groupe et de ses déclinaisons"""
+    if not group.image_url:
+        return []
+    return [group.image_url, *(group.image_variants or {}).values()]
+
+
+def enqueue_deletions(db: AsyncSession, image_urls: list[str]):
+    """
+    Planifie la suppression des objets correspondant aux URLs.
+    Pris en compte au commit de la transaction en cours ; les URLs externes sont ignorées.
+    """
+    for image_url in image_urls:
+        object_key = storage_service.object_key_from_url(image_url)
+        if object_key is None:
+            logger.warning(f"URL hors du bucket, suppression ignorée: {image_url}")
+            continue
+        db.add(models.StorageDeletion(object_key=object_key))
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(settings.STORAGE_DELETION_MAX_BACKOFF_SECONDS, 10 * 2 ** attempts))
+
+
+async def _claim_deletion_batch(now: datetime) -> list[tuple[int, str, int]]:
+    """
+    Réserve un lot d'objets en attente en repoussant leur prochaine tentative, puis valide :
+    aucun verrou n'est conservé pendant l'appel au stockage. Un lot dont le worker
+    s'arrête redevient disponible après STORAGE_DELETION_CLAIM_SECONDS.
+
+    Returns:
+        (id, object_key, attempts) des lignes réservées
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.StorageDeletion.id, models.StorageDeletion.object_key, models.StorageDeletion.attempts)
+            .where(models.StorageDeletion.next_attempt_at <= now)
+            .order_by(models.StorageDeletion.id)
+            .limit(settings.STORAGE_DELETION_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = [tuple(row) for row in result]
+        if claimed:
+            await db.execute(
+                update(models.StorageDeletion)
+                .where(models.StorageDeletion.id.in_([row[0] for row in claimed]))
+                .values(next_attempt_at=now + timedelta(seconds=settings.STORAGE_DELETION_CLAIM_SECONDS))
+            )
+            await db.commit()
+    return claimed
+
+
+async def process_deletion_batch() -> int:
+    """
+    Supprime un lot d'objets en attente, en trois temps : réservation (transaction courte,
+    SKIP LOCKED : plusieurs workers peuvent traiter la file en parallèle), appel au
+    stockage hors transaction, puis enregistrement du résultat.
+
+    Returns:
+        Le nombre de lignes traitées
+    """
+    now = datetime.now(UTC)
+    claimed = await _claim_deletion_batch(now)
+    if not claimed:
+        return 0
+
+    try:
+        errors = await storage_service.delete_objects(sorted({object_key for _, object_key, _ in claimed}))
+    except (ClientError, BotoCoreError) as e:
+        errors = {object_key: str(e) for _, object_key, _ in claimed}
+
+    done_ids = [row_id for row_id, object_key, _ in claimed if object_key not in errors]
+    async with AsyncSessionLocal() as db:
+        if done_ids:
+            await db.execute(delete(models.StorageDeletion).where(models.StorageDeletion.id.in_(done_ids)))
+        # Échecs regroupés par (tentatives, erreur) : une requête par lot lors d'une panne du stockage
+        failures = defaultdict(list)
+        for row_id, object_key, attempts in claimed:
+            if object_key in errors:
+                failures[(attempts, errors[object_key][:1000])].append(row_id)
+        failed_at = datetime.now(UTC)
+        for (attempts, error), row_ids in failures.items():
+            await db.execute(
+                update(models.StorageDeletion)
+                .where(models.StorageDeletion.id.in_(row_ids))
+                .values(
+                    attempts=attempts + 1,
+                    next_attempt_at=failed_at + _backoff(attempts + 1),
+                    last_error=error
+                )
+            )
+        await db.commit()
+
+    if errors:
+        logger.warning(f"Suppression de {len(errors)} objet(s) en échec, nouvelle tentative différée")
+    logger.info(f"{len(done_ids)} objet(s) supprimé(s) du stockage")
+    return len(claimed)
+
+
+async def run_deletion_worker():
+    """Tâche de fond : vide la file storage_deletions"""
+    while True:
+        try:
+            processed = await process_deletion_batch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement des suppressions: {e}", exc_info=True)
+            processed = 0
+        # Lot complet : il reste probablement des objets, on enchaîne sans attendre
+        if processed < settings.STORAGE_DELETION_BATCH_SIZE:
+            await asyncio.sleep(settings.STORAGE_DELETION_POLL_SECONDS)
+
+
+async def reconcile_orphans() -> int:
+    """
+    Met en file les objets du dossier des groupes qu'aucun DocksGroup ne référence.
+    Les objets récents sont ignorés pour ne pas supprimer un upload dont la transaction n'est pas encore validée.
+
+    Returns:
+        Le nombre d'objets mis en file
+    """
+    async with AsyncSessionLocal() as db:
+        locked = (await db.execute(select(func.pg_try_advisory_xact_lock(_RECONCILE_LOCK_ID)))).scalar()
+        if not locked:
+            return 0
+
+        groups = await db.execute(select(models.DocksGroup.image_url, models.DocksGroup.image_variants))
+        referenced = set()
+        for image_url, image_variants in groups:
+            for url in [image_url, *(image_variants or {}).values()]:
+                object_key = storage_service.object_key_from_url(url) if url else None
+                if object_key:
+                    referenced.add(object_key)
+
+        queued = set((await db.execute(select(models.StorageDeletion.object_key))).scalars())
+
+        cutoff = datetime.now(UTC) - timedelta(hours=settings.STORAGE_ORPHAN_GRACE_HOURS)
+        objects = await storage_service.list_objects(GROUP_IMAGES_PREFIX)
+        orphans = [
+            object_key for object_key, last_modified in objects
+            if last_modified < cutoff and object_key not in referenced and object_key not in queued
+        ]
+
+        for object_key in orphans:
+            db.add(models.StorageDeletion(object_key=object_key))
+        await db.commit()
+
+    if orphans:
+        logger.info(f"{len(orphans)} objet(s) orphelin(s) mis en file de suppression")
+    return len(orphans)
+
+
+async def run_reconciliation_loop():
+    """Tâche de fond : balayage périodique des objets orphelins"""
+    while True:
+        try:
+            await reconcile_orphans()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erreur lors du balayage des objets orphelins: {e}", exc_info=True)
+        await asyncio.sleep(settings.STORAGE_RECONCILE_INTERVAL_HOURS * 3600)
@@ -0,0 +1,58 @@
+"""
+Répartition du temps d'occupation d'un dock par jour, sans accès à la base
+"""
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from app.models import DockStatus
+
+
+def _add_occupied(daily_usage: dict[date, float], start: datetime, end: datetime):
+    """Ajoute l'intervalle [start, end] en le découpant aux changements de jour (UTC)"""
+    current_time = start
+    while current_time.date() <= end.date():
+        day_end = datetime.combine(current_time.date(), datetime.max.time(), tzinfo=ZoneInfo("UTC"))
+        day_end = day_end.replace(hour=23, minute=59, second=59)
+
+        segment_end = min(end, day_end)
+        segment_seconds = (segment_end - current_time).total_seconds()
+
+        if current_time.date() in daily_usage:
+            daily_usage[current_time.date()] += segment_seconds
+
+        current_time = day_end + timedelta(seconds=1)
+
+
+def occupied_seconds_by_day(
+    initial_status: DockStatus,
+    history: Iterable[tuple[datetime, DockStatus]],
+    start: datetime,
+    end: datetime
+) -> dict[date, float]:
+    """
+    Secondes passées au statut OCCUPIED pour chaque jour de [start, end].
+
+    `initial_status` est le statut en vigueur à `start`, `history` les changements
+    (date, nouveau statut) de la période, dans l'ordre chronologique.
+    """
+    daily_usage = {}
+    current_date = start.date()
+    while current_date <= end.date():
+        daily_usage[current_date] = 0
+        current_date += timedelta(days=1)
+
+    previous_status = initial_status
+    previous_time = start
+
+    for changed_at, status in history:
+        if previous_status == DockStatus.OCCUPIED:
+            _add_occupied(daily_usage, previous_time, changed_at)
+        previous_status = status
+        previous_time = changed_at
+
+    # Ajouter le temps jusqu'à la fin de la période si le dernier statut est OCCUPIED
+    if previous_status == DockStatus.OCCUPIED and previous_time < end:
+        _add_occupied(daily_usage, previous_time, end)
+
+    return daily_usage
@@ -1,13 +1,177 @@
+import asyncio
+import itertools
+import logging
+
+from fastapi import Request
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+# En-tête permettant à un client de lire sur le primaire juste après une écriture
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+
+def _create_engine(url: str, pool_size: int, max_overflow: int, statement_timeout_ms: int, application_name: str):
+    """
+    Moteur avec son propre pool de connexions.
+    statement_timeout est appliqué à chaque connexion du pool par le serveur.
+    """
+    return create_async_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # Cache de requêtes préparées par connexion (0 derrière PgBouncer en mode transaction)
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "statement_timeout": str(statement_timeout_ms),
+                "application_name": application_name,
+            },
+        },
+    )
+
+
+# Pool principal : capteurs, routes publiques et administration courante
+engine = _create_engine(
+    settings.DATABASE_URL,
+    settings.DB_POOL_SIZE,
+    settings.DB_MAX_OVERFLOW,
+    settings.DB_STATEMENT_TIMEOUT_MS,
+    "wheelock",
+)
+
+# Pool séparé pour les requêtes lourdes (historique, statistiques) : elles ne peuvent
+# pas occuper les connexions dont dépend l'ingestion des capteurs
+analytics_engine = _create_engine(
+    settings.DATABASE_URL,
+    settings.DB_ANALYTICS_POOL_SIZE,
+    settings.DB_ANALYTICS_MAX_OVERFLOW,
+    settings.DB_ANALYTICS_STATEMENT_TIMEOUT_MS,
+    "wheelock-analytics",
+)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+AnalyticsSessionLocal = sessionmaker(
+    analytics_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+
+class ReplicaRouter:
+    """
+    Répartit les lectures entre les réplicas en lecture seule (round-robin).
+    Un réplica injoignable ou trop en retard est écarté jusqu'au prochain contrôle
+    réussi ; sans réplica disponible, les lectures retombent sur le primaire.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.urls = urls
+        # Pour chaque réplica : pool des lectures courtes et pool des statistiques
+        self.engines = [
+            (
+                _create_engine(url, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW,
+                               settings.DB_STATEMENT_TIMEOUT_MS, "wheelock-replica"),
+                _create_engine(url, settings.DB_ANALYTICS_POOL_SIZE, settings.DB_ANALYTICS_MAX_OVERFLOW,
+                               settings.DB_ANALYTICS_STATEMENT_TIMEOUT_MS, "wheelock-replica-analytics"),
+            )
+            for url in urls
+        ]
+        self._sessions = [
+            tuple(sessionmaker(e, class_=AsyncSession, expire_on_commit=False) for e in engines)
+            for engines in self.engines
+        ]
+        self._healthy = list(range(len(urls)))
+        self._counter = itertools.count()
+
+    def session_factory(self, analytics: bool = False) -> sessionmaker | None:
+        """Fabrique de sessions du prochain réplica disponible, None s'il n'y en a aucun"""
+        healthy = self._healthy
+        if not healthy:
+            return None
+        index = healthy[next(self._counter) % len(healthy)]
+        return self._sessions[index][1 if analytics else 0]
+
+    async def _is_healthy(self, index: int) -> bool:
+        try:
+            async with self._sessions[index][0]() as db:
+                row = (await db.execute(text(
+                    "SELECT pg_is_in_recovery() AS in_recovery, "
+                    "pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AS caught_up, "
+                    "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) AS lag"
+                ))).one()
+        except Exception as e:
+            logger.warning(f"Réplica {index} injoignable: {e}")
+            return False
+
+        if not row.in_recovery:
+            # Ancien réplica promu : il ne reçoit plus les écritures du primaire actuel
+            logger.warning(f"Réplica {index} n'est plus en lecture seule, écarté")
+            return False
+        # Primaire inactif : le retard apparent augmente sans écriture à rejouer
+        if row.caught_up or row.lag is None or row.lag <= settings.DB_REPLICA_MAX_LAG_SECONDS:
+            return True
+        logger.warning(f"Réplica {index} en retard de {row.lag:.0f} s, écarté")
+        return False
+
+    async def check_health(self):
+        results = await asyncio.gather(*(self._is_healthy(i) for i in range(len(self.urls))))
+        healthy = [i for i, ok in enumerate(results) if ok]
+        if healthy != self._healthy:
+            logger.info(f"Réplicas disponibles: {len(healthy)}/{len(self.urls)}")
+        self._healthy = healthy
+
+    async def run_health_checks(self):
+        """Tâche de fond : contrôle périodique de la disponibilité et du retard des réplicas"""
+        while True:
+            try:
+                await self.check_health()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur lors du contrôle des réplicas: {e}", exc_info=True)
+            await asyncio.sleep(settings.DB_REPLICA_HEALTH_CHECK_SECONDS)
+
+    async def dispose(self):
+        for engines in self.engines:
+            for replica_engine in engines:
+                await replica_engine.dispose()
+
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+)
+
+
+def _read_session_factory(request: Request, analytics: bool) -> sessionmaker:
+    primary = AnalyticsSessionLocal if analytics else AsyncSessionLocal
+    if request.headers.get(READ_PRIMARY_HEADER):
+        return primary
+    return replica_router.session_factory(analytics) or primary
+
+
+async def disable_statement_timeout(db: AsyncSession):
+    """Lève statement_timeout pour la transaction en cours (maintenance, recalculs complets)"""
+    await db.execute(text("SET LOCAL statement_timeout = 0"))
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_read_db(request: Request):
+    """Session en lecture seule : réplica si disponible, primaire sinon ou avec l'en-tête X-Read-Primary"""
+    async with _read_session_factory(request, analytics=False)() as session:
+        yield session
+
+async def get_analytics_db(request: Request):
+    """Comme get_read_db, avec les pools et le statement_timeout des statistiques"""
+    async with _read_session_factory(request, analytics=True)() as session:
+        yield session
@@ -1,8 +1,22 @@
+import time
+
+# Début du chargement du module, pour le rapport de démarrage
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, admin, public, sensor, websocket, defect, logs, stats
-from app import models
-from app.database import engine
+from app.api import auth, admin, public, sensor, websocket, defect, logs, stats, profiling, metrics as metrics_api
+from app.database import engine, analytics_engine, replica_router, AsyncSessionLocal
+from app.core.log_stats import backfill_counters_if_empty
+from app.core.checkpoints import run_checkpoint_loop
+from app.core.storage import storage_service
+from app.core.storage_cleanup import run_deletion_worker, run_reconciliation_loop
+from app.core.defect_notifications import run_notification_worker
+from app.core.config import settings
+from app.core import metrics
+from app.core.query_timing import QueryTimingMiddleware, instrument_engine
+import asyncio
 import logging
 
 # Configuration du logging
@@ -12,7 +26,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Wheelock API")
+app = FastAPI(title="Wheelock API", default_response_class=ORJSONResponse)
+
+# Durée de chaque phase du démarrage (secondes), exposée dans les logs
+startup_timings: dict[str, float] = {}
 
 # CORS middleware
 import os
@@ -26,12 +43,54 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryTimingMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.register_pool("primary", engine)
+metrics.register_pool("analytics", analytics_engine)
+for index, replica_engines in enumerate(replica_router.engines):
+    metrics.register_pool(f"replica{index}", replica_engines[0])
+    metrics.register_pool(f"replica{index}-analytics", replica_engines[1])
+
+for instrumented_engine in [engine, analytics_engine, *(e for engines in replica_router.engines for e in engines)]:
+    instrument_engine(instrumented_engine)
+
+# Tâches de fond lancées au démarrage du worker
+background_tasks: list[asyncio.Task] = []
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(models.Base.metadata.create_all)
-    logger.info("Wheelock API started successfully")
+    """
+    Le schéma est géré par les migrations (alembic upgrade head, lancé avant l'API) :
+    le démarrage d'un worker ne fait qu'une requête et lance les tâches de fond
+    """
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await backfill_counters_if_empty(db)
+    startup_timings["counters"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    # Vérification du bucket en arrière-plan : un MinIO lent ne retarde pas le démarrage
+    background_tasks.append(asyncio.create_task(storage_service.ensure_bucket()))
+    background_tasks.append(asyncio.create_task(run_deletion_worker()))
+    background_tasks.append(asyncio.create_task(run_reconciliation_loop()))
+    background_tasks.append(asyncio.create_task(run_notification_worker()))
+    background_tasks.append(asyncio.create_task(run_checkpoint_loop()))
+    if replica_router.urls:
+        background_tasks.append(asyncio.create_task(replica_router.run_health_checks()))
+    startup_timings["background_tasks"] = time.perf_counter() - started
+
+    report = ", ".join(f"{phase} {duration * 1000:.0f} ms" for phase, duration in startup_timings.items())
+    logger.info(f"Wheelock API started successfully ({report})")
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await engine.dispose()
+    await analytics_engine.dispose()
+    await replica_router.dispose()
 
 app.include_router(auth.router)
 app.include_router(admin.router)
@@ -40,4 +99,9 @@ app.include_router(sensor.router)
 app.include_router(websocket.router)
 app.include_router(defect.router)
 app.include_router(logs.router)
-app.include_router(stats.router)
\ No newline at end of file
+app.include_router(stats.router)
+app.include_router(profiling.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_api.router)
+
+startup_timings["import"] = time.perf_counter() - _import_started
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Index, cast, Enum as SQLEnum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Index, UniqueConstraint, text, cast, Enum as SQLEnum, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
 from geoalchemy2 import Geography
 from sqlalchemy.orm import declarative_base, relationship
 import enum
@@ -29,6 +30,7 @@ class DocksGroup(Base):
     description = Column(String, nullable=True)
     location = Column(Geography("POINT", srid=4326, spatial_index=True), nullable=False)
     image_url = Column(String, nullable=True)
+    image_variants = Column(JSONB, nullable=True)  # {"thumbnail": url, "medium": url, "full": url}
 
     docks = relationship(
         "Dock",
@@ -46,18 +48,33 @@ class Admin(Base):
 
 class DefectReport(Base):
     __tablename__ = "defect_reports"
+    __table_args__ = (
+        # Un seul signalement ouvert par groupe : les signalements répétés incrémentent report_count
+        Index(
+            "uq_defect_reports_pending_group",
+            "group_id",
+            unique=True,
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     group_id = Column(Integer, ForeignKey("docks_groups.id", ondelete="SET NULL"), nullable=True)
     group_name = Column(String, nullable=True)  # Sauvegarde du nom pour l'historique
     location = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
-    status = Column(String, default="pending", nullable=False)  # pending, in_progress, resolved
+    status = Column(String, default="pending", nullable=False)  # pending, in_progress, resolved, merged
+    report_count = Column(Integer, default=1, server_default="1", nullable=False)  # Nombre de signalements reçus
+    last_reported_at = Column(DateTime(timezone=True), nullable=True)
     
     group = relationship("DocksGroup")
 
 class DockStatusHistory(Base):
     __tablename__ = "dock_status_history"
+    __table_args__ = (
+        # Dernier statut d'un dock avant une date (DISTINCT ON (dock_id) ... ORDER BY dock_id, changed_at DESC)
+        Index("ix_dock_status_history_dock_id_changed_at", "dock_id", "changed_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     dock_id = Column(Integer, ForeignKey("docks.id", ondelete="SET NULL"), nullable=True)
@@ -66,4 +83,74 @@ class DockStatusHistory(Base):
     status = Column(SQLEnum(DockStatus), nullable=False)
     changed_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False, index=True)
     
-    dock = relationship("Dock")
\ No newline at end of file
+    dock = relationship("Dock")
+
+class DockStatusCounter(Base):
+    """Compteurs agrégés de dock_status_history, maintenus à chaque insertion"""
+    __tablename__ = "dock_status_counters"
+    __table_args__ = (
+        UniqueConstraint("dock_id", "status", name="uq_dock_status_counters_dock_status"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    dock_id = Column(Integer, ForeignKey("docks.id", ondelete="SET NULL"), nullable=True)
+    status = Column(SQLEnum(DockStatus), nullable=False)
+    change_count = Column(Integer, default=0, nullable=False)
+    first_changed_at = Column(DateTime(timezone=True), nullable=False)
+    last_changed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class DockStatusCheckpoint(Base):
+    """Photographie périodique du statut de chaque dock, pour borner la relecture de l'historique"""
+    __tablename__ = "dock_status_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    taken_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    dock_id = Column(Integer, ForeignKey("docks.id", ondelete="SET NULL"), nullable=True)
+    sensor_id = Column(String, nullable=False)
+    dock_name = Column(String, nullable=True)
+    status = Column(SQLEnum(DockStatus), nullable=False)
+    changed_at = Column(DateTime(timezone=True), nullable=False)  # Date du dernier changement connu
+
+
+class SensorCredential(Base):
+    """Clé d'API propre à un capteur, stockée sous forme d'empreinte SHA-256"""
+    __tablename__ = "sensor_credentials"
+
+    id = Column(Integer, primary_key=True)
+    sensor_id = Column(String, unique=True, nullable=False)  # Hardware ID du capteur
+    key_hash = Column(String(64), unique=True, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class StorageDeletion(Base):
+    """File d'attente des objets à supprimer du stockage, alimentée dans la même transaction"""
+    __tablename__ = "storage_deletions"
+
+    id = Column(Integer, primary_key=True)
+    object_key = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False, index=True)
+    last_error = Column(String, nullable=True)
+
+
+class DefectNotification(Base):
+    """Notification email en attente, écrite dans la même transaction que le signalement"""
+    __tablename__ = "defect_notifications"
+
+    id = Column(Integer, primary_key=True)
+    report_id = Column(Integer, ForeignKey("defect_reports.id", ondelete="SET NULL"), nullable=True)
+    group_id = Column(Integer, nullable=True)
+    group_name = Column(String, nullable=True)
+    location = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
+    last_error = Column(String, nullable=True)
+
+    report = relationship("DefectReport")
+
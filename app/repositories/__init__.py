@@ -0,0 +1,27 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, get_read_db
+from app.repositories.base import DockRecord, DocksRepository, GroupRecord
+from app.repositories.memory import InMemoryDocksRepository
+from app.repositories.postgis import PostgisDocksRepository
+
+__all__ = [
+    "DockRecord",
+    "DocksRepository",
+    "GroupRecord",
+    "InMemoryDocksRepository",
+    "PostgisDocksRepository",
+    "get_docks_repository",
+    "get_read_docks_repository",
+]
+
+
+async def get_docks_repository(db: AsyncSession = Depends(get_db)) -> DocksRepository:
+    """Dépôt sur le primaire ; remplaçable via app.dependency_overrides (tests, benchmarks)"""
+    return PostgisDocksRepository(db)
+
+
+async def get_read_docks_repository(db: AsyncSession = Depends(get_read_db)) -> DocksRepository:
+    """Dépôt en lecture seule (réplica si disponible)"""
+    return PostgisDocksRepository(db)
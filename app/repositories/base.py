@@ -0,0 +1,52 @@
+"""
+Accès aux groupes de docks et aux docks, indépendant du stockage
+
+Les routers manipulent des enregistrements immuables plutôt que des objets ORM :
+la même logique peut tourner sur PostGIS ou entièrement en mémoire.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.models import DockStatus
+
+
+@dataclass(frozen=True)
+class DockRecord:
+    id: int
+    sensor_id: str
+    name: str | None
+    status: DockStatus
+    group_id: int
+
+
+@dataclass(frozen=True)
+class GroupRecord:
+    id: int
+    name: str
+    description: str | None
+    latitude: float
+    longitude: float
+    image_url: str | None = None
+    image_variants: dict[str, str] | None = None
+    docks: list[DockRecord] = field(default_factory=list)
+
+
+class DocksRepository(ABC):
+
+    @abstractmethod
+    async def list_groups(
+        self,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_meters: float = 1000
+    ) -> list[GroupRecord]:
+        """Groupes avec leurs docks, éventuellement limités à un rayon autour d'un point"""
+
+    @abstractmethod
+    async def get_dock_by_sensor(self, sensor_id: str) -> DockRecord | None:
+        """Dock associé à un capteur"""
+
+    @abstractmethod
+    async def change_dock_status(self, dock: DockRecord, status: DockStatus, changed_at: datetime):
+        """Enregistre le nouveau statut, l'historique et les compteurs, puis valide"""
@@ -0,0 +1,64 @@
+"""
+Implémentation en mémoire du dépôt des docks, sans base de données
+
+Pour les tests et les benchmarks des routers : même comportement que PostGIS,
+filtre de rayon par la formule de haversine (sphère, écart < 0,5 % avec l'ellipsoïde).
+"""
+import math
+from dataclasses import replace
+from datetime import datetime
+
+from app.models import DockStatus
+from app.repositories.base import DockRecord, DocksRepository, GroupRecord
+
+EARTH_RADIUS_METERS = 6_371_008.8
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+class InMemoryDocksRepository(DocksRepository):
+
+    def __init__(self, groups: list[GroupRecord] = (), docks: list[DockRecord] = ()):
+        self.groups: dict[int, GroupRecord] = {group.id: replace(group, docks=[]) for group in groups}
+        self.docks: dict[int, DockRecord] = {}
+        self._docks_by_sensor: dict[str, int] = {}
+        for dock in docks:
+            self.add_dock(dock)
+        # (dock_id, statut, date) dans l'ordre des changements
+        self.history: list[tuple[int, DockStatus, datetime]] = []
+
+    def add_dock(self, dock: DockRecord):
+        self.docks[dock.id] = dock
+        self._docks_by_sensor[dock.sensor_id] = dock.id
+
+    async def list_groups(
+        self,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_meters: float = 1000
+    ) -> list[GroupRecord]:
+        groups = self.groups.values()
+        if lat is not None and lon is not None:
+            groups = [
+                group for group in groups
+                if haversine_meters(lat, lon, group.latitude, group.longitude) <= radius_meters
+            ]
+
+        docks_by_group: dict[int, list[DockRecord]] = {}
+        for dock in self.docks.values():
+            docks_by_group.setdefault(dock.group_id, []).append(dock)
+        return [replace(group, docks=docks_by_group.get(group.id, [])) for group in groups]
+
+    async def get_dock_by_sensor(self, sensor_id: str) -> DockRecord | None:
+        dock_id = self._docks_by_sensor.get(sensor_id)
+        return self.docks.get(dock_id) if dock_id is not None else None
+
+    async def change_dock_status(self, dock: DockRecord, status: DockStatus, changed_at: datetime):
+        self.docks[dock.id] = replace(self.docks[dock.id], status=status)
+        self.history.append((dock.id, status, changed_at))
@@ -0,0 +1,102 @@
+"""
+Implémentation PostGIS du dépôt des docks
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from geoalchemy2 import Geometry
+from sqlalchemy import select, update, func, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.core.log_stats import record_status_change
+from app.models import DockStatus
+from app.repositories.base import DockRecord, DocksRepository, GroupRecord
+
+
+def _dock_record(dock: models.Dock) -> DockRecord:
+    return DockRecord(
+        id=dock.id,
+        sensor_id=dock.sensor_id,
+        name=dock.name,
+        status=dock.status,
+        group_id=dock.group_id
+    )
+
+
+class PostgisDocksRepository(DocksRepository):
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_groups(
+        self,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_meters: float = 1000
+    ) -> list[GroupRecord]:
+        # Coordonnées extraites par PostGIS : pas de décodage WKB côté Python
+        point = cast(models.DocksGroup.location, Geometry)
+        query = select(
+            models.DocksGroup.id,
+            models.DocksGroup.name,
+            models.DocksGroup.description,
+            models.DocksGroup.image_url,
+            models.DocksGroup.image_variants,
+            func.ST_Y(point).label("latitude"),
+            func.ST_X(point).label("longitude"),
+        )
+        docks_query = select(models.Dock)
+
+        if lat is not None and lon is not None:
+            user_point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), 4326)
+            query = query.where(
+                func.ST_DWithin(
+                    models.DocksGroup.location,
+                    user_point,
+                    radius_meters
+                )
+            )
+            docks_query = docks_query.where(models.Dock.group_id.in_(query.with_only_columns(models.DocksGroup.id)))
+
+        groups = (await self.db.execute(query)).all()
+        docks_by_group = defaultdict(list)
+        for dock in (await self.db.execute(docks_query)).scalars():
+            docks_by_group[dock.group_id].append(_dock_record(dock))
+
+        return [
+            GroupRecord(
+                id=group.id,
+                name=group.name,
+                description=group.description,
+                latitude=group.latitude,
+                longitude=group.longitude,
+                image_url=group.image_url,
+                image_variants=group.image_variants,
+                docks=docks_by_group.get(group.id, []),
+            )
+            for group in groups
+        ]
+
+    async def get_dock_by_sensor(self, sensor_id: str) -> DockRecord | None:
+        result = await self.db.execute(
+            select(models.Dock).where(models.Dock.sensor_id == sensor_id)
+        )
+        dock = result.scalars().first()
+        return _dock_record(dock) if dock is not None else None
+
+    async def change_dock_status(self, dock: DockRecord, status: DockStatus, changed_at: datetime):
+        await self.db.execute(
+            update(models.Dock)
+            .where(models.Dock.id == dock.id)
+            .values(status=status)
+        )
+        self.db.add(models.DockStatusHistory(
+            dock_id=dock.id,
+            sensor_id=dock.sensor_id,
+            dock_name=dock.name,
+            status=status,
+            changed_at=changed_at
+        ))
+        await record_status_change(self.db, dock.id, status, changed_at)
+        await self.db.commit()
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Literal, Optional, List
+from datetime import datetime
 
 from app.models import DockStatus
 
@@ -37,6 +38,7 @@ class DocksGroupResponse(BaseModel):
     name: str
     description: Optional[str]
     image_url: Optional[str]
+    image_variants: Optional[dict[str, str]] = Field(None, description="URLs WebP par taille (thumbnail, medium, full)")
     latitude: float
     longitude: float
     total_docks: int
@@ -50,6 +52,7 @@ class DocksGroupWithDocksResponse(BaseModel):
     name: str
     description: Optional[str]
     image_url: Optional[str]
+    image_variants: Optional[dict[str, str]] = Field(None, description="URLs WebP par taille (thumbnail, medium, full)")
     latitude: float
     longitude: float
     docks: list[DockResponse]
@@ -78,6 +81,23 @@ class DefectReport(BaseModel):
     group_id: int = Field(..., description="ID du groupe de docks", example=1)
     location: str | None = Field(None, max_length=500, description="Information complémentaire sur la localisation")
 
+class DefectReportStatusUpdate(BaseModel):
+    status: Literal["in_progress", "resolved"] = Field(
+        ..., description="Nouveau statut : le signalement n'est plus ouvert aux signalements répétés", example="resolved"
+    )
+
+class DefectReportResponse(BaseModel):
+    id: int
+    group_id: Optional[int]
+    group_name: Optional[str]
+    status: str
+    report_count: int
+    created_at: datetime
+    last_reported_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
 class DailyUsage(BaseModel):
     """Utilisation quotidienne d'un capteur"""
     date: str = Field(..., description="Date au format YYYY-MM-DD", example="2026-01-15")
@@ -144,7 +164,7 @@ class SensorLogEntry(BaseModel):
                 "sensor_id": "ESP32_TEST_001",
                 "sensor_name": "Quai A - Position 1",
                 "dock_id": 21,
-                "status": "OCCUPIED",
+                "status": "occupied",
                 "changed_at": "2026-01-22 14:30:45"
             }
         }
@@ -163,7 +183,7 @@ class LogsResponse(BaseModel):
                         "sensor_id": "ESP32_TEST_001",
                         "sensor_name": "Quai A - Position 1",
                         "dock_id": 21,
-                        "status": "OCCUPIED",
+                        "status": "occupied",
                         "changed_at": "2026-01-22 14:30:45"
                     },
                     {
@@ -171,7 +191,39 @@ class LogsResponse(BaseModel):
                         "sensor_id": "ESP32_TEST_001",
                         "sensor_name": "Quai A - Position 1",
                         "dock_id": 21,
-                        "status": "AVAILABLE",
+                        "status": "available",
+                        "changed_at": "2026-01-22 12:15:30"
+                    }
+                ]
+            }
+        }
+
+class DockStateEntry(BaseModel):
+    dock_id: int
+    sensor_id: str
+    dock_name: Optional[str]
+    status: str
+    changed_at: str = Field(..., description="Date du dernier changement de statut avant l'instant demandé")
+
+class FleetStateResponse(BaseModel):
+    """État de tous les docks à un instant donné"""
+    ts: str
+    checkpoint: Optional[str] = Field(None, description="Photographie utilisée comme point de départ de la relecture")
+    docks: List[DockStateEntry] = Field(
+        ..., description="Docks ayant au moins un changement de statut jusqu'à l'instant demandé"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ts": "2026-01-22 14:30:00",
+                "checkpoint": "2026-01-22 00:00:00",
+                "docks": [
+                    {
+                        "dock_id": 21,
+                        "sensor_id": "ESP32_TEST_001",
+                        "dock_name": "Quai A - Position 1",
+                        "status": "occupied",
                         "changed_at": "2026-01-22 12:15:30"
                     }
                 ]
@@ -1,38 +1,92 @@
 from fastapi import WebSocket
+import asyncio
 import logging
+import struct
+import time
+
+import orjson
+
+from app.core import metrics
+from app.core.change_feed import change_feed
+from app.core.config import settings
+from app.models import DockStatus
 
 logger = logging.getLogger(__name__)
 
+# Trame binaire : suite d'enregistrements de 13 octets, little-endian
+# (version du changement, dock_id, group_id, code du statut)
+BINARY_RECORD = struct.Struct("<IIIB")
+STATUS_CODES = {
+    DockStatus.AVAILABLE.value: 0,
+    DockStatus.OCCUPIED.value: 1,
+    DockStatus.OUT_OF_SERVICE.value: 2,
+}
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, batch_window: float = settings.WEBSOCKET_BATCH_WINDOW_MS / 1000):
         self.active_connections: list[WebSocket] = []
+        self.binary_connections: list[WebSocket] = []
+        self.batch_window = batch_window
+        # Enregistrements binaires en attente du prochain envoi groupé
+        self._pending: list[bytes] = []
+        self._flush_task: asyncio.Task | None = None
 
-    async def connect(self, websocket: WebSocket):
+    def _update_gauge(self):
+        metrics.websocket_connections.set(len(self.active_connections) + len(self.binary_connections))
+
+    async def connect(self, websocket: WebSocket, binary: bool = False):
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"Nouvelle connexion. Total: {len(self.active_connections)}")
-        print(f"Nouvelle connexion. Total: {len(self.active_connections)}")
+        (self.binary_connections if binary else self.active_connections).append(websocket)
+        self._update_gauge()
+        logger.info(f"Nouvelle connexion{' (binaire)' if binary else ''}. Total: {len(self.active_connections) + len(self.binary_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"Connexion fermée. Total: {len(self.active_connections)}")
-            print(f"Connexion fermée. Total: {len(self.active_connections)}")
+        for connections in (self.active_connections, self.binary_connections):
+            if websocket in connections:
+                connections.remove(websocket)
+                self._update_gauge()
+                logger.info(f"Connexion fermée. Total: {len(self.active_connections) + len(self.binary_connections)}")
 
-    async def broadcast(self, message: dict):
-        # Envoie le message à tous les clients connectés
+    async def _send_all(self, connections: list[WebSocket], send):
+        """Envoie une trame déjà encodée à chaque client, et retire ceux en échec"""
         disconnected = []
-        for connection in self.active_connections:
+        for connection in connections:
             try:
-                await connection.send_json(message)
-                print(f"Message envoyé à {connection}: {message}")
+                await send(connection)
             except Exception as e:
                 # Marquer comme déconnecté si l'envoi échoue
                 logger.warning(f"Erreur d'envoi: {e}")
+                metrics.websocket_send_failures.inc()
                 disconnected.append(connection)
-        
+
         # Nettoyer les connexions fermées
         for connection in disconnected:
             self.disconnect(connection)
 
-manager = ConnectionManager()
\ No newline at end of file
+    async def _flush_binary(self):
+        """Envoie en une seule trame les enregistrements accumulés pendant la fenêtre"""
+        if self.batch_window:
+            await asyncio.sleep(self.batch_window)
+        self._flush_task = None
+        frame, self._pending = b"".join(self._pending), []
+        if frame:
+            await self._send_all(self.binary_connections, lambda connection: connection.send_bytes(frame))
+
+    async def broadcast(self, message: dict):
+        # Envoie le message à tous les clients connectés (et aux clients SSE / long-poll)
+        started = time.perf_counter()
+        version = change_feed.publish(message)
+
+        if self.binary_connections:
+            self._pending.append(BINARY_RECORD.pack(
+                version, message["dock_id"], message["group_id"], STATUS_CODES[message["status"]]
+            ))
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_binary())
+
+        # JSON encodé une seule fois pour tous les clients
+        text = orjson.dumps(message).decode()
+        await self._send_all(self.active_connections, lambda connection: connection.send_text(text))
+        metrics.websocket_broadcast_duration.observe(time.perf_counter() - started)
+
+manager = ConnectionManager()
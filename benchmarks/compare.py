@@ -0,0 +1,93 @@
+"""
+Compare deux rapports de benchmarks.sensor_fanout, benchmarks.read_endpoints
+ou benchmarks.serialization
+(avant / après une modification).
+
+Une dégradation supérieure au seuil (débit en baisse, latence ou requêtes SQL en
+hausse) donne un code de sortie 1, pour une utilisation en intégration continue.
+
+Usage:
+    python -m benchmarks.compare before.json after.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+
+# (chemin dans le rapport, libellé, True si une valeur plus élevée est meilleure)
+METRICS = [
+    (("updates_per_s",), "mises à jour/s", True),
+    (("changed_per_s",), "changements/s", True),
+    (("http_latency", "p50_ms"), "HTTP p50 (ms)", False),
+    (("http_latency", "p99_ms"), "HTTP p99 (ms)", False),
+    (("delivery_latency", "p50_ms"), "diffusion p50 (ms)", False),
+    (("delivery_latency", "p99_ms"), "diffusion p99 (ms)", False),
+    (("db_queries_per_update", "changed"), "requêtes SQL (changement)", False),
+    (("db_queries_per_update", "unchanged"), "requêtes SQL (inchangé)", False),
+]
+
+# Métriques de chaque endpoint d'un rapport benchmarks.read_endpoints
+ENDPOINT_METRICS = [
+    ("p50_ms", "p50 (ms)", False),
+    ("p95_ms", "p95 (ms)", False),
+    ("cpu_ms", "CPU (ms)", False),
+    ("db_queries", "requêtes SQL", False),
+    ("rows_read", "lignes lues", False),
+    ("peak_memory_kb", "pic mémoire (Ko)", False),
+]
+
+
+def metrics_of(report: dict) -> list[tuple[tuple[str, ...], str, bool]]:
+    if "endpoints" not in report:
+        return METRICS
+    return [
+        (("endpoints", endpoint, key), f"{endpoint} {label}", higher_is_better)
+        for endpoint in report["endpoints"]
+        for key, label, higher_is_better in ENDPOINT_METRICS
+    ]
+
+
+def lookup(report: dict, path: tuple[str, ...]):
+    value = report
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Dégradation tolérée (%%)")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    if before.get("parameters") != after.get("parameters"):
+        print(f"Attention : paramètres différents\n  {before.get('parameters')}\n  {after.get('parameters')}")
+
+    metrics = metrics_of(before)
+    width = max(len(label) for _, label, _ in metrics) + 2
+    print(f"{'':<{width}} {before.get('revision') or 'avant':>12} {after.get('revision') or 'après':>12} {'écart':>9}")
+    regressions = []
+    for path, label, higher_is_better in metrics:
+        old, new = lookup(before, path), lookup(after, path)
+        if old is None or new is None:
+            print(f"{label:<{width}} {str(old):>12} {str(new):>12}")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = " !" if worse > args.threshold else ""
+        if flag:
+            regressions.append(label)
+        print(f"{label:<{width}} {old:>12.2f} {new:>12.2f} {change:>+8.1f}%{flag}")
+
+    if regressions:
+        print(f"Dégradation au-delà de {args.threshold:.0f} % : {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
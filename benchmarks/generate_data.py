@@ -0,0 +1,194 @@
+"""
+Jeu de données synthétique pour benchmarks/read_endpoints.py, chargé par COPY.
+
+Groupes répartis autour de quelques villes (dispersion gaussienne de quelques km),
+docks répartis entre les groupes, et historique de statuts sur plusieurs années
+(alternance libre/occupé, quelques passages hors service). Les index de l'historique
+sont supprimés pendant le chargement puis recréés, et les compteurs de
+dock_status_counters recalculés.
+
+Échelles prédéfinies (groupes / docks / lignes d'historique) :
+    small   50 / 500 / 1 M
+    medium  500 / 5 000 / 20 M
+    large   5 000 / 50 000 / 200 M
+
+Usage (base jetable de benchmarks/docker-compose.yml, schéma créé par alembic upgrade head) :
+    python -m benchmarks.generate_data --scale small [--years 3] [--seed 1]
+
+Les données existantes des tables docks_groups, docks et de l'historique sont supprimées.
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta, UTC
+
+import benchmarks._env  # noqa: F401  (avant les imports app.*)
+
+import asyncpg
+
+SCALES = {
+    "small": (50, 500, 1_000_000),
+    "medium": (500, 5_000, 20_000_000),
+    "large": (5_000, 50_000, 200_000_000),
+}
+
+# (ville, latitude, longitude, poids)
+CITIES = [
+    ("Paris", 48.8566, 2.3522, 10),
+    ("Lyon", 45.7640, 4.8357, 4),
+    ("Marseille", 43.2965, 5.3698, 4),
+    ("Toulouse", 43.6047, 1.4442, 3),
+    ("Bordeaux", 44.8378, -0.5792, 3),
+    ("Lille", 50.6292, 3.0573, 3),
+    ("Nantes", 47.2184, -1.5536, 2),
+    ("Strasbourg", 48.5734, 7.7521, 2),
+    ("Rennes", 48.1173, -1.6778, 2),
+    ("Grenoble", 45.1885, 5.7245, 1),
+]
+SPREAD_KM = 4.0
+
+# Index de l'historique recréés après le chargement
+HISTORY_INDEXES = {
+    "ix_dock_status_history_changed_at": "CREATE INDEX ix_dock_status_history_changed_at "
+                                         "ON dock_status_history (changed_at)",
+    "ix_dock_status_history_dock_id_changed_at": "CREATE INDEX ix_dock_status_history_dock_id_changed_at "
+                                                 "ON dock_status_history (dock_id, changed_at)",
+}
+
+CHUNK_ROWS = 50_000
+
+
+def asyncpg_dsn() -> str:
+    return os.environ["DATABASE_URL"].replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def group_rows(count: int, rng: random.Random):
+    weights = [city[3] for city in CITIES]
+    for group_id in range(1, count + 1):
+        name, lat, lon, _ = rng.choices(CITIES, weights=weights)[0]
+        # Décalage en km converti en degrés (la longitude dépend de la latitude)
+        lat += rng.gauss(0, SPREAD_KM) / 111.0
+        lon += rng.gauss(0, SPREAD_KM) / (111.0 * math.cos(math.radians(lat)))
+        yield (group_id, f"{name} - Station {group_id}", f"SRID=4326;POINT({lon:.6f} {lat:.6f})")
+
+
+def dock_rows(count: int, groups: int, rng: random.Random):
+    for dock_id in range(1, count + 1):
+        status = "OUT_OF_SERVICE" if rng.random() < 0.02 else rng.choice(("AVAILABLE", "OCCUPIED"))
+        yield (dock_id, f"SIM_{dock_id:06d}", f"Dock {dock_id}", status, rng.randint(1, groups))
+
+
+def history_rows(docks: int, rows: int, years: float, rng: random.Random):
+    """Historique de chaque dock, en ordre chronologique, sur `years` années jusqu'à maintenant"""
+    end = datetime.now(UTC)
+    start = end - timedelta(days=365 * years)
+    span = (end - start).total_seconds()
+    per_dock = max(1, rows // docks)
+    mean_gap = span / per_dock
+
+    for dock_id in range(1, docks + 1):
+        moment = start + timedelta(seconds=rng.expovariate(1 / mean_gap))
+        status = "AVAILABLE"
+        for _ in range(per_dock):
+            if rng.random() < 0.005:
+                status = "OUT_OF_SERVICE"
+            else:
+                status = "OCCUPIED" if status != "OCCUPIED" else "AVAILABLE"
+            yield (dock_id, f"SIM_{dock_id:06d}", f"Dock {dock_id}", status, moment)
+            moment += timedelta(seconds=rng.expovariate(1 / mean_gap))
+
+
+async def _csv_source(rows):
+    for group_id, name, location in rows:
+        yield f'{group_id},"{name}",{location}\n'.encode()
+
+
+async def copy_rows(conn: asyncpg.Connection, table: str, columns: list[str], rows, total: int):
+    """COPY par paquets, avec suivi de progression"""
+    started = time.perf_counter()
+    loaded = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_ROWS:
+            await conn.copy_records_to_table(table, records=chunk, columns=columns)
+            loaded += len(chunk)
+            chunk = []
+            elapsed = time.perf_counter() - started
+            print(f"\r  {table}: {loaded:,}/{total:,} lignes ({loaded / elapsed:,.0f}/s)", end="", flush=True)
+    if chunk:
+        await conn.copy_records_to_table(table, records=chunk, columns=columns)
+        loaded += len(chunk)
+    print(f"\r  {table}: {loaded:,} lignes en {time.perf_counter() - started:.1f} s" + " " * 20)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--groups", type=int, help="Remplace le nombre de groupes de l'échelle")
+    parser.add_argument("--docks", type=int, help="Remplace le nombre de docks de l'échelle")
+    parser.add_argument("--history-rows", type=int, help="Remplace le nombre de lignes d'historique")
+    parser.add_argument("--years", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    groups, docks, history = SCALES[args.scale]
+    groups = args.groups or groups
+    docks = args.docks or docks
+    history = args.history_rows or history
+    rng = random.Random(args.seed)
+
+    conn = await asyncpg.connect(asyncpg_dsn())
+    try:
+        await conn.execute("SET statement_timeout = 0")
+        await conn.execute(
+            "TRUNCATE dock_status_counters, dock_status_checkpoints, dock_status_history, "
+            "defect_notifications, defect_reports, docks, docks_groups RESTART IDENTITY CASCADE"
+        )
+        for index in HISTORY_INDEXES:
+            await conn.execute(f"DROP INDEX IF EXISTS {index}")
+
+        # Géographie transmise sous forme EWKT : COPY texte pour cette table
+        await conn.copy_to_table(
+            "docks_groups",
+            source=_csv_source(group_rows(groups, rng)),
+            columns=["id", "name", "location"],
+            format="csv",
+        )
+        print(f"  docks_groups: {groups:,} lignes")
+        await copy_rows(conn, "docks", ["id", "sensor_id", "name", "status", "group_id"], dock_rows(docks, groups, rng), docks)
+        await copy_rows(
+            conn,
+            "dock_status_history",
+            ["dock_id", "sensor_id", "dock_name", "status", "changed_at"],
+            history_rows(docks, history, args.years, rng),
+            history,
+        )
+
+        for index, ddl in HISTORY_INDEXES.items():
+            started = time.perf_counter()
+            await conn.execute(ddl)
+            print(f"  {index} recréé en {time.perf_counter() - started:.1f} s")
+        for table in ("docks_groups", "docks"):
+            await conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+        await conn.execute("ANALYZE docks_groups, docks, dock_status_history")
+    finally:
+        await conn.close()
+
+    # Compteurs agrégés, comme après scripts/rebuild_log_stats.py
+    from app.core.log_stats import rebuild_counters
+    from app.database import AsyncSessionLocal, engine
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await rebuild_counters(db)
+        await db.commit()
+    await engine.dispose()
+    print(f"  dock_status_counters recalculés en {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
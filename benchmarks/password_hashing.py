@@ -0,0 +1,92 @@
+"""
+Impact des connexions admin (bcrypt) sur la latence de la boucle d'événements.
+
+Une sonde simule le chemin /api/sensor/update : toutes les 10 ms elle se
+planifie sur la boucle et mesure son retard. Pendant ce temps, une rafale de
+connexions vérifie des mots de passe, soit directement dans la boucle
+(comportement historique), soit via verify_password_async (pool dédié).
+
+Usage:
+    python -m benchmarks.password_hashing [--logins 20] [--concurrency 5]
+"""
+import argparse
+import asyncio
+import math
+import statistics
+import time
+
+# Seules les fonctions de hachage sont utilisées : aucune connexion à la base
+import benchmarks._env  # noqa: F401
+
+from app.core.security import get_password_hash, verify_password, verify_password_async
+
+PROBE_INTERVAL = 0.01
+
+
+async def probe(stop: asyncio.Event, delays: list[float]):
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        delays.append(max(0.0, time.perf_counter() - expected))
+
+
+async def login_burst(mode: str, logins: int, concurrency: int, hashed: str):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if mode == "inline":
+                verify_password("wheelock-password", hashed)
+            else:
+                await verify_password_async("wheelock-password", hashed)
+            # Laisse la main, comme le ferait le reste du handler
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+async def run(mode: str, logins: int, concurrency: int, hashed: str) -> dict:
+    stop = asyncio.Event()
+    delays: list[float] = []
+    probe_task = asyncio.create_task(probe(stop, delays))
+
+    start = time.perf_counter()
+    if mode == "idle":
+        await asyncio.sleep(1)
+    else:
+        await login_burst(mode, logins, concurrency, hashed)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+
+    delays.sort()
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "samples": len(delays),
+        "p50_ms": statistics.median(delays) * 1000,
+        "p99_ms": delays[math.ceil(len(delays) * 0.99) - 1] * 1000 if delays else 0.0,
+        "max_ms": delays[-1] * 1000 if delays else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("wheelock-password")
+
+    print(f"{'mode':<10} {'durée (s)':>10} {'échantillons':>13} {'p50 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}")
+    for mode in ("idle", "inline", "offloaded"):
+        result = await run(mode, args.logins, args.concurrency, hashed)
+        print(
+            f"{result['mode']:<10} {result['elapsed_s']:>10.2f} {result['samples']:>13} "
+            f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['max_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
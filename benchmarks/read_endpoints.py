@@ -0,0 +1,191 @@
+"""
+Latence, lignes lues et mémoire des endpoints de lecture, sur le jeu de données courant.
+
+L'application est appelée en processus (httpx.ASGITransport, sans tâches de fond) :
+  - latence : p50/p95/max sur --repeat appels, après un appel d'échauffement,
+  - temps base de données et nombre de requêtes SQL (en-tête Server-Timing),
+  - lignes lues : écart de pg_stat_user_tables (seq_tup_read + idx_tup_fetch) sur les appels,
+  - mémoire : pic d'allocations Python (tracemalloc) lors d'un appel supplémentaire.
+
+Charger un jeu de données par échelle avec benchmarks.generate_data, puis :
+    python -m benchmarks.read_endpoints --output medium.json [--only logs_stats] [--repeat 5]
+    python -m benchmarks.compare before.json after.json
+
+Les statement_timeout des pools sont désactivés pour mesurer les endpoints les plus lents.
+"""
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, UTC
+
+from benchmarks._env import setdefault_env
+
+setdefault_env(
+    DB_STATEMENT_TIMEOUT_MS="0",
+    DB_ANALYTICS_STATEMENT_TIMEOUT_MS="0",
+    SLOW_QUERY_THRESHOLD_MS="0",
+    SERVER_TIMING_ENABLED="true",
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import select, text  # noqa: E402
+
+from app import models  # noqa: E402
+from app.core.jwt import create_admin_token  # noqa: E402
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+
+BENCH_ADMIN = "benchmark"
+
+# Nom -> (chemin, paramètres)
+ENDPOINTS = {
+    "public_groups": ("/api/public/docks-groups", {}),
+    "public_groups_nearby": ("/api/public/docks-groups", {"lat": 48.8566, "lon": 2.3522, "radius_meters": 2000}),
+    "admin_docks": ("/api/admin/docks", {}),
+    "logs_latest": ("/api/admin/logs", {"limit": 100}),
+    "logs_sensor": ("/api/admin/logs", {"sensor_id": "SIM_000001", "limit": 1000}),
+    "logs_stats": ("/api/admin/logs/stats", {}),
+    "logs_stats_fresh": ("/api/admin/logs/stats", {"fresh": "true"}),
+    "usage_by_day": ("/api/admin/stats/usage-by-day", {}),
+}
+
+ROWS_READ_QUERY = text(
+    "SELECT coalesce(sum(coalesce(seq_tup_read, 0) + coalesce(idx_tup_fetch, 0)), 0) FROM pg_stat_user_tables"
+)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+def server_timing(response: httpx.Response) -> dict:
+    timing = {}
+    for metric in response.headers.get("Server-Timing", "").split(","):
+        name, _, params = metric.strip().partition(";")
+        if params.startswith("dur="):
+            timing[name] = float(params[len("dur="):])
+        elif params.startswith("desc="):
+            timing[name] = int(params[len("desc="):].strip('"'))
+    return timing
+
+
+async def rows_read() -> int:
+    """Compteur cumulé des lignes lues ; les statistiques sont publiées au plus toutes les secondes"""
+    await asyncio.sleep(1.1)
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT pg_stat_clear_snapshot()"))
+        return (await db.execute(ROWS_READ_QUERY)).scalar()
+
+
+async def dataset_scale() -> dict:
+    async with AsyncSessionLocal() as db:
+        estimates = await db.execute(text(
+            "SELECT relname, reltuples::bigint FROM pg_class "
+            "WHERE relname IN ('docks_groups', 'docks', 'dock_status_history')"
+        ))
+        return {name: count for name, count in estimates}
+
+
+async def admin_token() -> str:
+    async with AsyncSessionLocal() as db:
+        admin = (await db.execute(
+            select(models.Admin).where(models.Admin.username == BENCH_ADMIN)
+        )).scalars().first()
+        if admin is None:
+            # Mot de passe inutilisable : le jeton est créé directement
+            admin = models.Admin(username=BENCH_ADMIN, hashed_password="!", is_active=True)
+            db.add(admin)
+            await db.commit()
+        return create_admin_token(admin.id)
+
+
+async def measure(client: httpx.AsyncClient, path: str, params: dict, repeat: int) -> dict:
+    response = await client.get(path, params=params)
+    response.raise_for_status()
+
+    rows_before = await rows_read()
+    latencies, db_ms, queries = [], [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(path, params=params)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        timing = server_timing(response)
+        db_ms.append(timing.get("db", 0.0))
+        queries.append(timing.get("db-queries", 0))
+    rows_after = await rows_read()
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    await client.get(path, params=params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "db_ms": sum(db_ms) / repeat,
+        "db_queries": sum(queries) / repeat,
+        "rows_read": (rows_after - rows_before) / repeat,
+        "peak_memory_kb": peak / 1024,
+        "response_bytes": len(response.content),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=ENDPOINTS, help="Limiter à certains endpoints")
+    parser.add_argument("--output", help="Fichier JSON du rapport (pour benchmarks.compare)")
+    args = parser.parse_args()
+
+    scale = await dataset_scale()
+    token = await admin_token()
+    names = args.only or list(ENDPOINTS)
+
+    print(f"Jeu de données : {scale}")
+    print(f"{'endpoint':<22} {'p50 (ms)':>10} {'p95 (ms)':>10} {'db (ms)':>10} {'requêtes':>9} {'lignes lues':>12} {'pic (Ko)':>10}")
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=None
+    ) as client:
+        for name in names:
+            path, params = ENDPOINTS[name]
+            result = results[name] = await measure(client, path, params, args.repeat)
+            print(
+                f"{name:<22} {result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} {result['db_ms']:>10.1f} "
+                f"{result['db_queries']:>9.0f} {result['rows_read']:>12,.0f} {result['peak_memory_kb']:>10,.0f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "revision": git_revision(),
+                "date": datetime.now(UTC).isoformat(),
+                "parameters": {"repeat": args.repeat, "scale": scale},
+                "endpoints": results,
+            }, output, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,271 @@
+"""
+Charge d'ingestion des capteurs et diffusion WebSocket, de bout en bout.
+
+N capteurs virtuels publient sur /api/sensor/update (arrivées poissonniennes,
+bascule libre/occupé avec une probabilité donnée, sinon renvoi du même statut)
+pendant que M clients écoutent /ws/docks. Le rapport donne :
+  - le débit de mises à jour (total et avec changement de statut),
+  - la latence HTTP et la latence capteur -> client WebSocket (p50/p95/p99/max),
+  - le nombre de requêtes SQL par mise à jour (en-tête Server-Timing).
+
+Base PostGIS jetable et API dédiée :
+    docker compose -f benchmarks/docker-compose.yml up -d --build
+    python -m benchmarks.sensor_fanout --sensors 200 --clients 50 --output before.json
+    docker compose -f benchmarks/docker-compose.yml down -v
+
+Comparaison entre deux commits : python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, UTC
+
+import benchmarks._env  # noqa: F401  (avant les imports app.*)
+
+import httpx
+import websockets
+
+BENCH_GROUP_NAME = "Benchmark"
+SENSOR_PREFIX = "BENCH_"
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+def summarize(values: list[float]) -> dict:
+    """Percentiles en millisecondes"""
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": max(values) * 1000 if values else 0.0,
+    }
+
+
+def db_queries(response: httpx.Response) -> int | None:
+    """Nombre de requêtes SQL indiqué par l'en-tête Server-Timing (db-queries;desc="N")"""
+    for metric in response.headers.get("Server-Timing", "").split(","):
+        name, _, params = metric.strip().partition(";")
+        if name == "db-queries" and params.startswith("desc="):
+            return int(params[len("desc="):].strip('"'))
+    return None
+
+
+async def seed(sensors: int):
+    """Crée le groupe et les docks du benchmark, tous remis à l'état libre"""
+    from sqlalchemy import select, update
+    from sqlalchemy.dialects.postgresql import insert
+    from app import models
+    from app.database import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        group = (await db.execute(
+            select(models.DocksGroup).where(models.DocksGroup.name == BENCH_GROUP_NAME)
+        )).scalars().first()
+        if group is None:
+            group = models.DocksGroup(name=BENCH_GROUP_NAME, location="SRID=4326;POINT(2.3522 48.8566)")
+            db.add(group)
+            await db.flush()
+
+        await db.execute(
+            insert(models.Dock)
+            .values([
+                {"sensor_id": f"{SENSOR_PREFIX}{i:05d}", "group_id": group.id, "status": models.DockStatus.AVAILABLE}
+                for i in range(sensors)
+            ])
+            .on_conflict_do_nothing(index_elements=["sensor_id"])
+        )
+        await db.execute(
+            update(models.Dock)
+            .where(models.Dock.sensor_id.like(f"{SENSOR_PREFIX}%"))
+            .values(status=models.DockStatus.AVAILABLE)
+        )
+        await db.commit()
+    await engine.dispose()
+
+
+class Run:
+    def __init__(self):
+        # (sensor_id, statut) -> instant d'envoi de la dernière mise à jour correspondante
+        self.sent_at: dict[tuple[str, str], float] = {}
+        self.http_latencies: list[float] = []
+        self.delivery_latencies: list[float] = []
+        self.queries_changed: list[int] = []
+        self.queries_unchanged: list[int] = []
+        self.changed = 0
+        self.unchanged = 0
+        self.errors: dict[str, int] = {}
+        self.deliveries = 0
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+async def sensor(
+    client: httpx.AsyncClient,
+    run: Run,
+    sensor_id: str,
+    rate: float,
+    flap_probability: float,
+    deadline: float
+):
+    status = "available"
+    # Départs étalés pour éviter une rafale synchronisée au démarrage
+    await asyncio.sleep(random.expovariate(rate))
+    while time.perf_counter() < deadline:
+        if random.random() < flap_probability:
+            status = "occupied" if status == "available" else "available"
+        started = time.perf_counter()
+        run.sent_at[(sensor_id, status)] = started
+        try:
+            response = await client.post(
+                "/api/sensor/update",
+                json={"sensor_id": sensor_id, "status": status}
+            )
+        except httpx.HTTPError as e:
+            run.error(type(e).__name__)
+        else:
+            run.http_latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                run.error(f"http_{response.status_code}")
+            else:
+                queries = db_queries(response)
+                if response.json().get("changed"):
+                    run.changed += 1
+                    if queries is not None:
+                        run.queries_changed.append(queries)
+                else:
+                    run.unchanged += 1
+                    if queries is not None:
+                        run.queries_unchanged.append(queries)
+        await asyncio.sleep(random.expovariate(rate))
+
+
+async def listener(ws_url: str, run: Run, ready: asyncio.Event, connected: list[int], clients: int, stop: asyncio.Event):
+    async with websockets.connect(ws_url, max_queue=None) as ws:
+        connected[0] += 1
+        if connected[0] == clients:
+            ready.set()
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            received = time.perf_counter()
+            if isinstance(message, bytes):
+                continue
+            data = json.loads(message)
+            sent = run.sent_at.get((data.get("sensor_id"), data.get("status")))
+            if sent is not None and sent <= received:
+                run.delivery_latencies.append(received - sent)
+                run.deliveries += 1
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:18000")
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée de la mesure (s)")
+    parser.add_argument("--rate", type=float, default=1.0, help="Mises à jour par capteur et par seconde")
+    parser.add_argument("--flap-probability", type=float, default=0.5, help="Probabilité de changement de statut")
+    parser.add_argument("--seed", type=int, default=1, help="Graine aléatoire (runs reproductibles)")
+    parser.add_argument("--no-seed-db", action="store_true", help="Ne pas créer les docks du benchmark")
+    parser.add_argument("--output", help="Fichier JSON du rapport (pour benchmarks.compare)")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if not args.no_seed_db:
+        await seed(args.sensors)
+
+    run = Run()
+    ws_url = args.base_url.replace("http", "ws", 1) + "/ws/docks"
+    ready = asyncio.Event()
+    stop = asyncio.Event()
+    connected = [0]
+    listeners = [
+        asyncio.create_task(listener(ws_url, run, ready, connected, args.clients, stop))
+        for _ in range(args.clients)
+    ]
+    if args.clients:
+        await asyncio.wait_for(ready.wait(), timeout=30)
+
+    limits = httpx.Limits(max_connections=args.sensors, max_keepalive_connections=args.sensors)
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        headers={"X-API-Key": os.environ["SENSOR_API_KEY"]},
+        limits=limits,
+        timeout=30
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            sensor(client, run, f"{SENSOR_PREFIX}{i:05d}", args.rate, args.flap_probability, deadline)
+            for i in range(args.sensors)
+        ))
+        elapsed = time.perf_counter() - started
+
+    # Laisse arriver les derniers messages diffusés
+    await asyncio.sleep(1)
+    stop.set()
+    await asyncio.gather(*listeners, return_exceptions=True)
+
+    report = {
+        "revision": git_revision(),
+        "date": datetime.now(UTC).isoformat(),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "no_seed_db")},
+        "elapsed_s": elapsed,
+        "updates_per_s": (run.changed + run.unchanged) / elapsed,
+        "changed_per_s": run.changed / elapsed,
+        "updates": {"changed": run.changed, "unchanged": run.unchanged},
+        "errors": run.errors,
+        "http_latency": summarize(run.http_latencies),
+        "delivery_latency": summarize(run.delivery_latencies),
+        "deliveries": {"received": run.deliveries, "expected": run.changed * args.clients},
+        "db_queries_per_update": {
+            "changed": statistics.mean(run.queries_changed) if run.queries_changed else None,
+            "unchanged": statistics.mean(run.queries_unchanged) if run.queries_unchanged else None,
+        },
+    }
+
+    print(f"Révision {report['revision']} - {args.sensors} capteurs, {args.clients} clients, {elapsed:.1f} s")
+    print(f"  mises à jour/s    {report['updates_per_s']:10.1f}  (changements {report['changed_per_s']:.1f}/s)")
+    for name in ("http_latency", "delivery_latency"):
+        stats = report[name]
+        print(
+            f"  {name:<17} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+            f"p99 {stats['p99_ms']:8.2f} ms  max {stats['max_ms']:8.2f} ms"
+        )
+    print(f"  diffusions reçues {run.deliveries} / {report['deliveries']['expected']}")
+    queries = report["db_queries_per_update"]
+    print(f"  requêtes SQL      changement {queries['changed']}  inchangé {queries['unchanged']}")
+    if run.errors:
+        print(f"  erreurs           {run.errors}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
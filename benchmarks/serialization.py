@@ -0,0 +1,218 @@
+"""
+Coût CPU de la sérialisation des listings, sans base de données.
+
+Deux mesures :
+  - endpoint : CPU par requête de /api/public/docks-groups, appelé en processus
+    (httpx.ASGITransport) sur un dépôt en mémoire (InMemoryDocksRepository) ;
+    à lancer sur deux commits puis comparer avec benchmarks.compare,
+  - chemins de sérialisation, dans le même run : validation Pydantic + json
+    (comportement historique) contre orjson, pour les groupes et les logs.
+
+Usage:
+    python -m benchmarks.serialization [--groups 5000] [--docks-per-group 10] [--logs 1000] [--output after.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta, UTC
+
+# Aucune connexion à la base n'est ouverte
+from benchmarks._env import setdefault_env
+
+setdefault_env(SERVER_TIMING_ENABLED="false")
+
+import httpx  # noqa: E402
+import orjson  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app import schemas  # noqa: E402
+from app.core.serialization import format_timestamp, group_metadata  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import DockStatus  # noqa: E402
+from app.repositories import DockRecord, GroupRecord, InMemoryDocksRepository, get_read_docks_repository  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+STATUSES = [DockStatus.AVAILABLE, DockStatus.OCCUPIED, DockStatus.OUT_OF_SERVICE]
+
+
+def build_repository(groups: int, docks_per_group: int, rng: random.Random) -> InMemoryDocksRepository:
+    return InMemoryDocksRepository(
+        groups=[
+            GroupRecord(
+                id=group_id,
+                name=f"Station {group_id}",
+                description="Groupe de docks généré pour le benchmark",
+                latitude=48.8566 + rng.gauss(0, 0.05),
+                longitude=2.3522 + rng.gauss(0, 0.05),
+                image_url=f"http://minio:9000/images-public/images/{group_id}.jpg",
+            )
+            for group_id in range(1, groups + 1)
+        ],
+        docks=[
+            DockRecord(
+                id=dock_id,
+                sensor_id=f"SIM_{dock_id:06d}",
+                name=f"Dock {dock_id}",
+                status=rng.choice(STATUSES),
+                group_id=(dock_id - 1) // docks_per_group + 1,
+            )
+            for dock_id in range(1, groups * docks_per_group + 1)
+        ],
+    )
+
+
+def build_log_rows(count: int, rng: random.Random) -> list[dict]:
+    now = datetime.now(UTC)
+    return [
+        {
+            "id": i,
+            "sensor_id": f"SIM_{i % 5000:06d}",
+            "name": f"Dock {i % 5000}",
+            "dock_id": i % 5000,
+            "status": rng.choice(STATUSES),
+            "changed_at": now - timedelta(seconds=i * 37),
+        }
+        for i in range(count)
+    ]
+
+
+def cpu_ms(func, repeat: int) -> float:
+    """Temps CPU moyen d'un appel (ms), après un appel d'échauffement"""
+    func()
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) / repeat * 1000
+
+
+def serialization_paths(groups: list[GroupRecord], rows: list[dict], repeat: int) -> dict:
+    groups_adapter = TypeAdapter(list[schemas.DocksGroupResponse])
+    logs_adapter = TypeAdapter(schemas.LogsResponse)
+
+    def group_dicts():
+        return [
+            {
+                "id": group.id, "name": group.name, "description": group.description,
+                "image_url": group.image_url, "image_variants": group.image_variants,
+                "latitude": group.latitude, "longitude": group.longitude,
+                "total_docks": len(group.docks),
+                "available_docks": sum(1 for d in group.docks if d.status == DockStatus.AVAILABLE),
+            }
+            for group in groups
+        ]
+
+    def groups_pydantic():
+        json.dumps(groups_adapter.dump_python(groups_adapter.validate_python(group_dicts()), mode="json"))
+
+    def groups_orjson():
+        b"[" + b",".join(
+            group_metadata(group) + b',"total_docks":%d,"available_docks":%d}' % (
+                len(group.docks), sum(1 for d in group.docks if d.status == DockStatus.AVAILABLE)
+            )
+            for group in groups
+        ) + b"]"
+
+    def logs_pydantic():
+        logs = [
+            schemas.SensorLogEntry(
+                id=row["id"], sensor_id=row["sensor_id"], sensor_name=row["name"], dock_id=row["dock_id"],
+                status=row["status"].value, changed_at=row["changed_at"].strftime("%Y-%m-%d %H:%M:%S")
+            )
+            for row in rows
+        ]
+        response = logs_adapter.validate_python(schemas.LogsResponse(total=len(rows), logs=logs))
+        json.dumps(logs_adapter.dump_python(response, mode="json"))
+
+    def logs_orjson():
+        orjson.dumps({"total": len(rows), "logs": [
+            {
+                "id": row["id"], "sensor_id": row["sensor_id"], "sensor_name": row["name"],
+                "dock_id": row["dock_id"], "status": row["status"].value,
+                "changed_at": format_timestamp(row["changed_at"]),
+            }
+            for row in rows
+        ]})
+
+    return {
+        "groups": {"pydantic_ms": cpu_ms(groups_pydantic, repeat), "orjson_ms": cpu_ms(groups_orjson, repeat)},
+        "logs": {"pydantic_ms": cpu_ms(logs_pydantic, repeat), "orjson_ms": cpu_ms(logs_orjson, repeat)},
+    }
+
+
+async def endpoint_cpu(repository: InMemoryDocksRepository, repeat: int) -> dict:
+    app.dependency_overrides[get_read_docks_repository] = lambda: repository
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            response = await client.get("/api/public/docks-groups")
+            response.raise_for_status()
+            latencies = []
+            started_cpu = time.process_time()
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = await client.get("/api/public/docks-groups")
+                latencies.append(time.perf_counter() - started)
+            cpu = (time.process_time() - started_cpu) / repeat
+    finally:
+        app.dependency_overrides.pop(get_read_docks_repository, None)
+
+    latencies.sort()
+    return {
+        "cpu_ms": cpu * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "response_bytes": len(response.content),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=5000)
+    parser.add_argument("--docks-per-group", type=int, default=10)
+    parser.add_argument("--logs", type=int, default=1000, help="Lignes de la page de logs sérialisée")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Fichier JSON du rapport (pour benchmarks.compare)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    repository = build_repository(args.groups, args.docks_per_group, rng)
+    groups = await repository.list_groups()
+    rows = build_log_rows(args.logs, rng)
+
+    endpoint = await endpoint_cpu(repository, args.repeat)
+    paths = serialization_paths(groups, rows, args.repeat)
+
+    print(f"Révision {git_revision()} - {args.groups} groupes, {args.groups * args.docks_per_group} docks, {args.logs} logs")
+    print(f"  /api/public/docks-groups  CPU {endpoint['cpu_ms']:8.2f} ms/requête  p50 {endpoint['p50_ms']:8.2f} ms")
+    for name, result in paths.items():
+        print(
+            f"  sérialisation {name:<7}    pydantic + json {result['pydantic_ms']:8.2f} ms  "
+            f"orjson {result['orjson_ms']:8.2f} ms  (x{result['pydantic_ms'] / result['orjson_ms']:.1f})"
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "revision": git_revision(),
+                "date": datetime.now(UTC).isoformat(),
+                "parameters": {k: v for k, v in vars(args).items() if k != "output"},
+                "endpoints": {"public_groups_memory": endpoint},
+                "serialization": paths,
+            }, output, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
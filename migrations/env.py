@@ -0,0 +1,62 @@
+"""
+Environnement Alembic : applique les migrations avec le moteur asynchrone de l'application
+"""
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from geoalchemy2 import alembic_helpers
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import models
+from app.core.config import settings
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        # Ignore les tables de PostGIS (spatial_ref_sys, topology...) et rend les colonnes spatiales
+        include_object=alembic_helpers.include_object,
+        process_revision_directives=alembic_helpers.writer,
+        render_item=alembic_helpers.render_item,
+        compare_type=True,
+        **kwargs
+    )
+
+
+def run_migrations_offline():
+    """Génère le SQL sans connexion (alembic upgrade head --sql)"""
+    _configure(url=settings.DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_migrations(connection):
+    _configure(connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online():
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=pool.NullPool,
+        # Création d'index ou fusion de données : pas de limite de durée
+        connect_args={"server_settings": {"statement_timeout": "0"}},
+    )
+    async with engine.connect() as connection:
+        await connection.run_sync(_run_migrations)
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
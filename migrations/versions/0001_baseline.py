@@ -0,0 +1,86 @@
+"""Schéma initial
+
+Schéma créé par create_all au démarrage avant l'introduction des migrations.
+Base existante : alembic stamp 0001, puis alembic upgrade head.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+dock_status = postgresql.ENUM("OUT_OF_SERVICE", "AVAILABLE", "OCCUPIED", name="dockstatus", create_type=False)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    op.execute("CREATE TYPE dockstatus AS ENUM ('OUT_OF_SERVICE', 'AVAILABLE', 'OCCUPIED')")
+
+    op.create_table(
+        "docks_groups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column(
+            "location",
+            geoalchemy2.Geography(geometry_type="POINT", srid=4326, spatial_index=False),
+            nullable=False
+        ),
+        sa.Column("image_url", sa.String(), nullable=True),
+    )
+    op.create_index("idx_docks_groups_location", "docks_groups", ["location"], postgresql_using="gist")
+
+    op.create_table(
+        "docks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sensor_id", sa.String(), nullable=False, unique=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("status", dock_status, nullable=False),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("docks_groups.id"), nullable=False),
+    )
+
+    op.create_table(
+        "admin_users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+    )
+
+    op.create_table(
+        "defect_reports",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("docks_groups.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("group_name", sa.String(), nullable=True),
+        sa.Column("location", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+    )
+
+    op.create_table(
+        "dock_status_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("dock_id", sa.Integer(), sa.ForeignKey("docks.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("sensor_id", sa.String(), nullable=False),
+        sa.Column("dock_name", sa.String(), nullable=True),
+        sa.Column("status", dock_status, nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_dock_status_history_changed_at", "dock_status_history", ["changed_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("dock_status_history")
+    op.drop_table("defect_reports")
+    op.drop_table("admin_users")
+    op.drop_table("docks")
+    op.drop_table("docks_groups")
+    op.execute("DROP TYPE dockstatus")
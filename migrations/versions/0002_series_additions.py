@@ -0,0 +1,138 @@
+"""Compteurs, photographies, clés capteurs, outbox et déduplication des signalements
+
+Tables et colonnes ajoutées depuis le schéma initial. Les bases ayant déjà tourné
+avec create_all / SCHEMA_PATCHES possèdent une partie de ces objets : chaque
+création est ignorée si l'objet existe déjà.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+dock_status = postgresql.ENUM("OUT_OF_SERVICE", "AVAILABLE", "OCCUPIED", name="dockstatus", create_type=False)
+
+
+def _create_table_if_missing(name: str, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE docks_groups ADD COLUMN IF NOT EXISTS image_variants JSONB")
+    op.execute("ALTER TABLE defect_reports ADD COLUMN IF NOT EXISTS report_count INTEGER NOT NULL DEFAULT 1")
+    op.execute("ALTER TABLE defect_reports ADD COLUMN IF NOT EXISTS last_reported_at TIMESTAMP WITH TIME ZONE")
+
+    # Fusion des doublons ouverts existants avant la création de l'index unique partiel
+    op.execute(
+        "UPDATE defect_reports AS kept SET report_count = merged.total "
+        "FROM (SELECT min(id) AS id, sum(report_count) AS total FROM defect_reports "
+        "WHERE status = 'pending' AND group_id IS NOT NULL GROUP BY group_id HAVING count(*) > 1) AS merged "
+        "WHERE kept.id = merged.id"
+    )
+    op.execute(
+        "UPDATE defect_reports SET status = 'merged' WHERE status = 'pending' AND group_id IS NOT NULL "
+        "AND id NOT IN (SELECT min(id) FROM defect_reports WHERE status = 'pending' "
+        "AND group_id IS NOT NULL GROUP BY group_id)"
+    )
+    op.create_index(
+        "uq_defect_reports_pending_group",
+        "defect_reports",
+        ["group_id"],
+        unique=True,
+        postgresql_where=sa.text("status = 'pending'"),
+        if_not_exists=True
+    )
+
+    op.create_index(
+        "ix_dock_status_history_dock_id_changed_at",
+        "dock_status_history",
+        ["dock_id", "changed_at"],
+        if_not_exists=True
+    )
+
+    _create_table_if_missing(
+        "dock_status_counters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("dock_id", sa.Integer(), sa.ForeignKey("docks.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("status", dock_status, nullable=False),
+        sa.Column("change_count", sa.Integer(), nullable=False),
+        sa.Column("first_changed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_changed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("dock_id", "status", name="uq_dock_status_counters_dock_status"),
+    )
+
+    _create_table_if_missing(
+        "dock_status_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("taken_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("dock_id", sa.Integer(), sa.ForeignKey("docks.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("sensor_id", sa.String(), nullable=False),
+        sa.Column("dock_name", sa.String(), nullable=True),
+        sa.Column("status", dock_status, nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_dock_status_checkpoints_taken_at", "dock_status_checkpoints", ["taken_at"], if_not_exists=True
+    )
+
+    _create_table_if_missing(
+        "sensor_credentials",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sensor_id", sa.String(), nullable=False, unique=True),
+        sa.Column("key_hash", sa.String(64), nullable=False, unique=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    _create_table_if_missing(
+        "storage_deletions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("object_key", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+    )
+    op.create_index(
+        "ix_storage_deletions_next_attempt_at", "storage_deletions", ["next_attempt_at"], if_not_exists=True
+    )
+
+    _create_table_if_missing(
+        "defect_notifications",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("report_id", sa.Integer(), sa.ForeignKey("defect_reports.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("group_id", sa.Integer(), nullable=True),
+        sa.Column("group_name", sa.String(), nullable=True),
+        sa.Column("location", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+    )
+    op.create_index(
+        "ix_defect_notifications_sent_at", "defect_notifications", ["sent_at"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("defect_notifications")
+    op.drop_table("storage_deletions")
+    op.drop_table("sensor_credentials")
+    op.drop_table("dock_status_checkpoints")
+    op.drop_table("dock_status_counters")
+    op.drop_index("ix_dock_status_history_dock_id_changed_at", table_name="dock_status_history")
+    op.drop_index("uq_defect_reports_pending_group", table_name="defect_reports")
+    # Les signalements fusionnés redeviennent indiscernables des doublons : statut conservé
+    op.drop_column("defect_reports", "last_reported_at")
+    op.drop_column("defect_reports", "report_count")
+    op.drop_column("docks_groups", "image_variants")
@@ -0,0 +1,65 @@
+import asyncio
+import re
+import subprocess
+import sys
+import time
+
+
+"""
+Rapport du temps de démarrage d'un worker.
+
+Lance l'import de app.main dans un processus neuf (python -X importtime) et affiche
+les paquets les plus coûteux, puis, avec --startup, exécute les hooks de démarrage
+et d'arrêt de l'application (base de données requise) et affiche la durée de chaque phase.
+
+Usage : python -m scripts.profile_startup [--startup] [--top N]
+"""
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_imports(top: int):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(result.returncode)
+
+    # Durée cumulée par paquet de premier niveau (fastapi, sqlalchemy, app...)
+    packages: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, _, _, module = match.groups()
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+
+    print(f"Import de app.main (processus neuf, interpréteur compris) : {elapsed * 1000:.0f} ms")
+    for package, duration in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {package:<30} {duration / 1000:8.1f} ms")
+
+
+async def profile_startup():
+    from app.main import app, startup_timings
+
+    started = time.perf_counter()
+    await app.router.startup()
+    elapsed = time.perf_counter() - started
+    await app.router.shutdown()
+
+    print(f"Hooks de démarrage : {elapsed * 1000:.0f} ms")
+    for phase, duration in startup_timings.items():
+        print(f"  {phase:<30} {duration * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    top = int(args[args.index("--top") + 1]) if "--top" in args else 15
+    profile_imports(top)
+    if "--startup" in args:
+        asyncio.run(profile_startup())
@@ -0,0 +1,86 @@
+import asyncio
+import sys
+from datetime import datetime, UTC
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.core.sensor_keys import generate_sensor_key, fingerprint
+from app import models
+
+
+"""
+Provisionne (ou révoque) les clés d'API individuelles des capteurs.
+
+Les clés générées sont affichées une seule fois au format CSV (sensor_id,api_key) :
+seule leur empreinte est conservée en base. Rediriger la sortie vers un fichier
+protégé pour le flash des ESP32.
+
+Les workers gardent les clés en cache (SENSOR_KEY_CACHE_TTL_SECONDS) : une révocation
+prend effet au plus tard après ce délai.
+"""
+async def provision(sensor_ids: list[str], rotate: bool):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.SensorCredential).where(models.SensorCredential.sensor_id.in_(sensor_ids))
+        )
+        existing = {credential.sensor_id: credential for credential in result.scalars()}
+
+        print("sensor_id,api_key")
+        for sensor_id in sensor_ids:
+            credential = existing.get(sensor_id)
+            if credential and credential.is_active and not rotate:
+                print(f"Capteur '{sensor_id}' déjà provisionné, ignoré (--rotate pour remplacer)", file=sys.stderr)
+                continue
+
+            api_key = generate_sensor_key()
+            if credential:
+                credential.key_hash = fingerprint(api_key)
+                credential.is_active = True
+                credential.revoked_at = None
+            else:
+                db.add(models.SensorCredential(sensor_id=sensor_id, key_hash=fingerprint(api_key)))
+            print(f"{sensor_id},{api_key}")
+
+        await db.commit()
+
+
+async def revoke(sensor_ids: list[str]):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.SensorCredential).where(models.SensorCredential.sensor_id.in_(sensor_ids))
+        )
+        for credential in result.scalars():
+            credential.is_active = False
+            credential.revoked_at = datetime.now(UTC)
+            print(f"Clé du capteur '{credential.sensor_id}' révoquée", file=sys.stderr)
+        await db.commit()
+
+
+def parse_args():
+    args = sys.argv[1:]
+    flags = {arg for arg in args if arg.startswith("--")}
+    sensor_ids = [arg for arg in args if not arg.startswith("--")]
+
+    # "-" : lecture des sensor_id sur l'entrée standard (un par ligne)
+    if sensor_ids == ["-"]:
+        sensor_ids = [line.strip() for line in sys.stdin if line.strip()]
+
+    if not sensor_ids or not flags <= {"--rotate", "--revoke"} or flags == {"--rotate", "--revoke"}:
+        print(
+            "Usage:\n"
+            "python scripts/provision_sensor_keys.py [--rotate] <sensor_id1> [<sensor_id2> ...]\n"
+            "python scripts/provision_sensor_keys.py --revoke <sensor_id1> [<sensor_id2> ...]\n"
+            "python scripts/provision_sensor_keys.py [--rotate | --revoke] - < sensor_ids.txt",
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    return sensor_ids, flags
+
+
+if __name__ == "__main__":
+    sensor_ids, flags = parse_args()
+    if "--revoke" in flags:
+        asyncio.run(revoke(sensor_ids))
+    else:
+        asyncio.run(provision(sensor_ids, rotate="--rotate" in flags))
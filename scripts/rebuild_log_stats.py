@@ -0,0 +1,19 @@
+import asyncio
+
+from app.database import AsyncSessionLocal
+from app.core.log_stats import rebuild_counters
+
+
+"""
+Recalcule la table dock_status_counters à partir de l'historique complet.
+À utiliser si les statistiques de /api/admin/logs/stats divergent de ?fresh=true.
+"""
+async def main():
+    async with AsyncSessionLocal() as db:
+        await rebuild_counters(db)
+        await db.commit()
+    print("Compteurs recalculés")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
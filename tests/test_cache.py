@@ -0,0 +1,42 @@
+from app.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=30, clock=clock)
+    cache.set(1, True)
+
+    clock.now = 29
+    assert cache.get(1) is True
+
+    clock.now = 30
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=30, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_pop_invalidates_entry():
+    cache = TTLCache(maxsize=10, ttl=30, clock=FakeClock())
+    cache.set(1, True)
+
+    assert cache.pop(1) is True
+    assert cache.get(1) is None
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+import orjson
+
+from app.core.change_feed import ChangeFeed
+
+
+def change(dock_id: int, group_id: int, status: str = "OCCUPIED") -> dict:
+    return {"dock_id": dock_id, "group_id": group_id, "sensor_id": f"ESP32_{dock_id:03d}", "status": status}
+
+
+def test_changes_since_filters_groups_and_detects_gaps():
+    feed = ChangeFeed(maxlen=3)
+    for dock_id, group_id in [(1, 1), (2, 2), (3, 1)]:
+        feed.publish(change(dock_id, group_id))
+
+    changes, reset = feed.changes_since(1, {1})
+    assert not reset
+    assert [orjson.loads(payload)["dock_id"] for _, payload in changes] == [3]
+    assert feed.changes_since(3) == ([], False)
+
+    feed.publish(change(4, 2))
+    # La version 1 a quitté le tampon : le client depuis la version 0 a perdu des changements
+    assert feed.changes_since(0) == ([], True)
+    assert feed.changes_since(1)[1] is False
+    # Version inconnue
+    assert feed.changes_since(10) == ([], True)
+
+
+def test_tokens_from_another_process_are_rejected():
+    feed = ChangeFeed(maxlen=3, epoch="a1b2")
+    feed.publish(change(1, 1))
+
+    assert feed.parse_token(feed.token(1)) == 1
+    # Même numéro émis par un autre worker ou avant un redémarrage
+    assert feed.parse_token(ChangeFeed(maxlen=3).token(1)) is None
+    assert feed.parse_token("a1b2-x") is None
+    assert orjson.loads(feed.changes_since(0)[0][0][1])["version"] == "a1b2-1"
+
+
+def test_long_poll_wakes_up_on_broadcast():
+    from app.main import app
+    from app.websockets import manager
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            token = (await client.get("/api/public/docks/changes")).json()["version"]
+            poll = asyncio.create_task(client.get(
+                "/api/public/docks/changes", params={"since": token, "group_id": 7, "timeout": 5}
+            ))
+            await asyncio.sleep(0.05)
+            await manager.broadcast(change(1, 3))
+            await manager.broadcast(change(2, 7))
+            return token, await poll
+
+    token, response = asyncio.run(scenario())
+
+    epoch, _, version = token.rpartition("-")
+    expected = f"{epoch}-{int(version) + 2}"
+    body = response.json()
+    assert body["reset"] is False and body["version"] == expected
+    assert body["changes"] == [{"version": expected, **change(2, 7)}]
+
+
+def test_subscribers_are_capped(monkeypatch):
+    from app.core.change_feed import change_feed
+    from app.core.config import settings
+    from app.main import app
+
+    monkeypatch.setattr(settings, "CHANGE_FEED_MAX_SUBSCRIBERS", 0)
+
+    async def call():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/api/public/docks/changes", params={"since": change_feed.token(change_feed.version)})
+
+    response = asyncio.run(call())
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, UTC
+from email import message_from_bytes
+
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.core.email import SMTPSender, build_defect_digest
+
+
+class LocalSMTPServer:
+    """Serveur SMTP minimal en mémoire : compte les connexions et conserve les messages reçus"""
+
+    def __init__(self):
+        self.connections = 0
+        self.messages: list[bytes] = []
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        writer.write(b"220 localhost ESMTP\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                writer.write(b"250-localhost\r\n250 8BITMIME\r\n")
+            elif command == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                data = b""
+                while (chunk := await reader.readline()) != b".\r\n":
+                    data += chunk
+                self.messages.append(data)
+                writer.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+
+@pytest_asyncio.fixture
+async def smtp_server(monkeypatch):
+    server = LocalSMTPServer()
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_PORT", listener.sockets[0].getsockname()[1])
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_USE_CREDENTIALS", False)
+    yield server
+    listener.close()
+    await listener.wait_closed()
+
+
+def test_digest_lists_every_report():
+    reports = [
+        (datetime(2026, 1, 22, 14, 30, tzinfo=UTC), "Borne près de l'entrée"),
+        (datetime(2026, 1, 22, 14, 32, tzinfo=UTC), None),
+    ]
+    message = build_defect_digest("Quai A", 3, reports)
+
+    assert message["Subject"] == "ALERTE - Groupe de docks défectueux - Quai A (2 signalements)"
+    body = message.get_content()
+    assert "Borne près de l&#x27;entrée" in body
+    assert "Non précisée" in body
+    assert "2026-01-22 14:32:00" in body
+
+
+@pytest.mark.asyncio
+async def test_sender_reuses_one_connection(smtp_server):
+    sender = SMTPSender()
+    for group in ("Quai A", "Quai B"):
+        await sender.send(build_defect_digest(group, 1, [(datetime.now(UTC), None)]))
+    await sender.close()
+
+    assert smtp_server.connections == 1
+    subjects = [message_from_bytes(data)["Subject"] for data in smtp_server.messages]
+    assert len(subjects) == 2
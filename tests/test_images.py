@@ -0,0 +1,35 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from app.core.images import VARIANT_SIZES, generate_variants
+
+
+def make_jpeg(path, width: int, height: int) -> str:
+    Image.new("RGB", (width, height), color=(200, 30, 30)).save(path, format="JPEG")
+    return str(path)
+
+
+def test_variants_are_webp_within_size_bounds(tmp_path):
+    variants = generate_variants(make_jpeg(tmp_path / "large.jpg", 4000, 3000))
+
+    assert set(variants) == set(VARIANT_SIZES)
+    for name, data in variants.items():
+        with Image.open(BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            assert max(image.size) == VARIANT_SIZES[name]
+
+
+def test_small_images_are_not_upscaled(tmp_path):
+    variants = generate_variants(make_jpeg(tmp_path / "small.jpg", 320, 200))
+
+    with Image.open(BytesIO(variants["full"])) as image:
+        assert image.size == (320, 200)
+
+
+def test_unreadable_content_is_rejected(tmp_path):
+    path = tmp_path / "not-an-image.jpg"
+    path.write_bytes(b"not an image")
+    with pytest.raises(UnidentifiedImageError):
+        generate_variants(str(path))
@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import REGISTRY, Counter, Histogram, MetricsMiddleware, http_request_duration, render
+
+
+def test_counter_and_histogram_exposition():
+    registry = []
+    updates = Counter("test_updates", "Mises à jour", ("result",), registry=registry)
+    updates.labels("changed").inc()
+    updates.labels("changed").inc()
+    latency = Histogram("test_latency_seconds", "Durée", buckets=(0.1, 1.0), registry=registry)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3.0)
+
+    assert 'test_updates_total{result="changed"} 2' in updates.render()
+    lines = latency.render()
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_latency_seconds_count 3" in lines
+    assert "test_updates_total" in render(registry)
+    assert not any(metric.name.startswith("test_") for metric in REGISTRY)
+
+
+def test_requests_are_labelled_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert http_request_duration.labels("GET", "/items/{item_id}", "200").count == 2
+    assert http_request_duration.labels("GET", "unmatched", "404").count == 1
+
+
+def test_metrics_endpoint_requires_configured_token(monkeypatch):
+    from app.api.metrics import router
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200 and "http_request_duration_seconds" in response.text
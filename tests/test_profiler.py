@@ -0,0 +1,35 @@
+import time
+
+from app.core.profiler import SamplingProfiler
+
+
+def busy_handler(duration: float):
+    deadline = time.perf_counter() + duration
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_samples_current_thread_as_collapsed_stacks():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_handler(0.2)
+    profiler.stop()
+
+    assert profiler.samples > 0
+    lines = profiler.collapsed().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("tests/test_profiler.py:busy_handler" in line for line in lines)
+    assert "test_samples_current_thread_as_collapsed_stacks;" in stack
+
+
+def test_stopped_profiler_takes_no_more_samples():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    profiler.stop()
+    samples = profiler.samples
+    time.sleep(0.01)
+
+    assert profiler.samples == samples
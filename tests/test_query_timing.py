@@ -0,0 +1,46 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.query_timing import QueryTimingMiddleware, instrument_engine
+
+
+def make_app():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(QueryTimingMiddleware)
+
+    @app.get("/docks/{dock_id}")
+    def get_dock(dock_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT :id, :hashed_password"), {"id": dock_id, "hashed_password": "$2b$12$secret"})
+        return {"id": dock_id}
+
+    return app
+
+
+def test_server_timing_reports_queries_of_the_request():
+    response = TestClient(make_app()).get("/docks/3")
+
+    metrics = dict(
+        part.strip().split(";", 1) for part in response.headers["Server-Timing"].split(",")
+    )
+    assert set(metrics) == {"db", "app", "db-queries"}
+    assert metrics["db-queries"] == 'desc="2"'
+
+
+def test_slow_queries_are_logged_with_route_and_redacted_parameters(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 1e-9)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_timing"):
+        TestClient(make_app()).get("/docks/7")
+
+    assert "GET /docks/{dock_id}" in caplog.text
+    assert "SELECT ?, ? -- id=7, hashed_password=***" in caplog.text
+    # Empreintes de mots de passe, de clés... jamais reproduites
+    assert "$2b$12$secret" not in caplog.text
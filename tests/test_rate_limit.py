@@ -0,0 +1,74 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.rate_limit import TokenBucketLimiter, client_ip
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_refill():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=3, clock=clock)
+
+    assert [limiter.consume("ESP32_001") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.consume("ESP32_001") == pytest.approx(1.0)
+
+    clock.now = 1.0
+    assert limiter.consume("ESP32_001") == 0.0
+
+
+def test_keys_are_independent():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=1, clock=FakeClock())
+
+    assert limiter.consume("ESP32_001") == 0.0
+    assert limiter.consume("ESP32_001") > 0
+    assert limiter.consume("ESP32_002") == 0.0
+
+
+def test_check_raises_429_with_retry_after():
+    limiter = TokenBucketLimiter(rate_per_minute=2, burst=1, clock=FakeClock())
+    limiter.check("10.0.0.1")
+
+    with pytest.raises(HTTPException) as exc_info:
+        limiter.check("10.0.0.1")
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "30"
+
+
+def test_idle_buckets_are_evicted():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=5, sweep_interval=10, clock=clock)
+    limiter.consume("ESP32_001")
+
+    clock.now = 6.0
+    limiter.consume("ESP32_002")
+    assert len(limiter) == 2
+
+    # ESP32_001 est de nouveau plein (5 s à 1 jeton/s), ESP32_002 non
+    clock.now = 10.0
+    limiter.consume("ESP32_003")
+    assert len(limiter) == 2
+
+
+def _request(forwarded_for: str | None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": ("10.0.0.2", 5000)})
+
+
+def test_client_ip_ignores_client_supplied_forwarded_entries():
+    spoofed = _request("1.2.3.4, 203.0.113.7")
+
+    assert client_ip(spoofed) == "10.0.0.2"
+    assert client_ip(spoofed, trusted_proxy_hops=1) == "203.0.113.7"
+    assert client_ip(spoofed, trusted_proxy_hops=2) == "1.2.3.4"
+    # Moins d'entrées que de proxies : en-tête non fiable
+    assert client_ip(_request("203.0.113.7"), trusted_proxy_hops=2) == "10.0.0.2"
+    assert client_ip(_request(None), trusted_proxy_hops=1) == "10.0.0.2"
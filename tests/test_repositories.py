@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, date, UTC
+
+import httpx
+import pytest
+
+from app.core.usage import occupied_seconds_by_day
+from app.models import DockStatus
+from app.repositories import DockRecord, GroupRecord, InMemoryDocksRepository, get_read_docks_repository
+
+PARIS = (48.8566, 2.3522)
+
+
+def make_repository() -> InMemoryDocksRepository:
+    return InMemoryDocksRepository(
+        groups=[
+            GroupRecord(id=1, name="Châtelet", description=None, latitude=48.8584, longitude=2.3470),
+            GroupRecord(id=2, name="Lyon Part-Dieu", description=None, latitude=45.7605, longitude=4.8595),
+        ],
+        docks=[
+            DockRecord(id=1, sensor_id="ESP32_001", name="A1", status=DockStatus.AVAILABLE, group_id=1),
+            DockRecord(id=2, sensor_id="ESP32_002", name="A2", status=DockStatus.OCCUPIED, group_id=1),
+            DockRecord(id=3, sensor_id="ESP32_003", name="B1", status=DockStatus.AVAILABLE, group_id=2),
+        ],
+    )
+
+
+def test_memory_repository_radius_and_status_change():
+    repository = make_repository()
+
+    nearby = asyncio.run(repository.list_groups(*PARIS, radius_meters=1000))
+    assert [group.id for group in nearby] == [1]
+    assert [dock.sensor_id for dock in nearby[0].docks] == ["ESP32_001", "ESP32_002"]
+    assert len(asyncio.run(repository.list_groups(*PARIS, radius_meters=400_000))) == 2
+
+    dock = asyncio.run(repository.get_dock_by_sensor("ESP32_001"))
+    changed_at = datetime(2026, 1, 14, 8, tzinfo=UTC)
+    asyncio.run(repository.change_dock_status(dock, DockStatus.OCCUPIED, changed_at))
+
+    assert asyncio.run(repository.get_dock_by_sensor("ESP32_001")).status == DockStatus.OCCUPIED
+    assert repository.history == [(1, DockStatus.OCCUPIED, changed_at)]
+
+
+def test_public_groups_without_database():
+    from app.main import app
+
+    repository = make_repository()
+    app.dependency_overrides[get_read_docks_repository] = lambda: repository
+
+    async def call():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/api/public/docks-groups", params={"lat": PARIS[0], "lon": PARIS[1]})
+
+    try:
+        response = asyncio.run(call())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    [group] = response.json()
+    assert (group["total_docks"], group["available_docks"]) == (2, 1)
+
+
+def test_occupied_seconds_split_across_days():
+    start = datetime(2026, 1, 14, tzinfo=UTC)
+    end = datetime(2026, 1, 15, 12, tzinfo=UTC)
+    history = [
+        (datetime(2026, 1, 14, 22, tzinfo=UTC), DockStatus.OCCUPIED),
+        (datetime(2026, 1, 15, 2, tzinfo=UTC), DockStatus.AVAILABLE),
+        (datetime(2026, 1, 15, 11, tzinfo=UTC), DockStatus.OCCUPIED),
+    ]
+
+    usage = occupied_seconds_by_day(DockStatus.AVAILABLE, history, start, end)
+
+    # Découpage à 23:59:59.999999 : écart d'une seconde au plus par jour
+    assert usage == {
+        date(2026, 1, 14): pytest.approx(2 * 3600, abs=1),
+        date(2026, 1, 15): pytest.approx(3 * 3600, abs=1),
+    }
@@ -0,0 +1,28 @@
+from datetime import datetime, UTC
+
+import orjson
+
+from app import schemas
+from app.core.serialization import format_timestamp, group_metadata
+from app.repositories import GroupRecord
+
+
+def test_group_fragment_matches_response_model():
+    group = GroupRecord(
+        id=7, name="Gare \"Nord\"", description=None, latitude=48.88, longitude=2.355,
+        image_url="https://example.com/a.jpg", image_variants={"thumbnail": "https://example.com/a_t.webp"},
+    )
+
+    payload = orjson.loads(group_metadata(group) + b',"total_docks":4,"available_docks":1}')
+
+    assert payload == schemas.DocksGroupResponse(
+        **payload | {"total_docks": 4, "available_docks": 1}
+    ).model_dump()
+    assert payload["name"] == "Gare \"Nord\"" and payload["image_variants"] == group.image_variants
+    # Même contenu : fragment servi depuis le cache
+    assert group_metadata(group) is group_metadata(group)
+
+
+def test_format_timestamp_matches_strftime():
+    value = datetime(2026, 1, 20, 7, 5, 9, 123456, tzinfo=UTC)
+    assert format_timestamp(value) == value.strftime("%Y-%m-%d %H:%M:%S")
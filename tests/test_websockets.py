@@ -0,0 +1,39 @@
+import asyncio
+
+from app.websockets import BINARY_RECORD, ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(text)
+
+    async def send_bytes(self, data):
+        self.frames.append(data)
+
+
+def test_binary_clients_receive_batched_records():
+    manager = ConnectionManager(batch_window=0.01)
+    json_client, binary_client = FakeWebSocket(), FakeWebSocket()
+
+    async def scenario():
+        await manager.connect(json_client)
+        await manager.connect(binary_client, binary=True)
+        await manager.broadcast({"dock_id": 1, "group_id": 3, "sensor_id": "ESP32_001", "status": "occupied"})
+        await manager.broadcast({"dock_id": 2, "group_id": 3, "sensor_id": "ESP32_002", "status": "out_of_service"})
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+
+    assert json_client.frames[0] == '{"dock_id":1,"group_id":3,"sensor_id":"ESP32_001","status":"occupied"}'
+    assert len(json_client.frames) == 2
+
+    [frame] = binary_client.frames
+    records = list(BINARY_RECORD.iter_unpack(frame))
+    assert [record[1:] for record in records] == [(1, 3, 1), (2, 3, 2)]
+    assert records[1][0] == records[0][0] + 1